@@ -0,0 +1,556 @@
+import bisect
+
+import numpy as np
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+def get_audio_duration(audio_path):
+    """Return the duration of an audio file, file object or 16 kHz sample array in seconds without decoding it."""
+    if isinstance(audio_path, np.ndarray):
+        return len(audio_path) / float(WHISPER_SAMPLE_RATE)
+
+    import soundfile as sf
+
+    info = sf.info(audio_path)
+    return info.frames / float(info.samplerate)
+
+
+def iter_audio_windows(audio_path, window_s=30.0, overlap_s=5.0, sr=WHISPER_SAMPLE_RATE):
+    """Yield (start_seconds, samples) windows of a file, reading one window at a time.
+
+    Consecutive windows overlap by ``overlap_s`` seconds so words cut at a
+    boundary are fully contained in at least one window. Only a single window
+    is held in memory, so memory use does not grow with the recording length.
+    ``audio_path`` may also be an in-memory 16 kHz array, which is windowed
+    with views rather than copies.
+    """
+    if overlap_s >= window_s:
+        raise ValueError("overlap_s must be smaller than window_s")
+
+    if isinstance(audio_path, np.ndarray):
+        for start_s in window_starts(len(audio_path) / float(sr), window_s, overlap_s):
+            yield start_s, read_audio_window(audio_path, start_s, window_s, sr)
+        return
+
+    import soundfile as sf
+
+    with sf.SoundFile(audio_path) as audio_file:
+        file_sr = audio_file.samplerate
+        window_frames = int(window_s * file_sr)
+        hop_frames = int((window_s - overlap_s) * file_sr)
+        start = 0
+        while start < audio_file.frames:
+            audio_file.seek(start)
+            block = audio_file.read(window_frames, dtype="float32", always_2d=True)
+            samples = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+            if file_sr != sr:
+                import librosa
+                samples = librosa.resample(samples, orig_sr=file_sr, target_sr=sr)
+            yield start / float(file_sr), np.ascontiguousarray(samples, dtype=np.float32)
+            if start + window_frames >= audio_file.frames:
+                break
+            start += hop_frames
+
+
+def decode_audio_file(audio_file, sr=WHISPER_SAMPLE_RATE):
+    """Decode an open binary file object straight to mono float32 samples at ``sr``.
+
+    Works on in-memory buffers (such as Streamlit uploads), so nothing is
+    written to disk.
+    """
+    import soundfile as sf
+
+    audio_file.seek(0)
+    samples, file_sr = sf.read(audio_file, dtype="float32", always_2d=True)
+    if samples.shape[1] > 1:
+        samples = samples.mean(axis=1, dtype=np.float32)
+    else:
+        samples = samples[:, 0]
+    if file_sr != sr:
+        import librosa
+        samples = librosa.resample(samples, orig_sr=file_sr, target_sr=sr)
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+def enhance_audio_in_place(y, coef=0.97, block_size=1 << 20):
+    """Pre-emphasize and peak-normalize a float32 signal without copying it.
+
+    Matches ``librosa.effects.preemphasis`` followed by ``librosa.util.normalize``
+    but works block by block from the end of the signal, so the temporaries
+    are bounded by ``block_size`` samples instead of the full recording.
+    """
+    if len(y) < 2:
+        return y
+    first, second = float(y[0]), float(y[1])
+
+    # Walk backwards so each block still sees the unmodified previous sample
+    end = len(y)
+    while end > 1:
+        start = max(1, end - block_size)
+        y[start:end] -= coef * y[start - 1:end - 1]
+        end = start
+    y[0] = first - coef * (2 * first - second)  # librosa's default initial condition
+
+    peak = 0.0
+    for start in range(0, len(y), block_size):
+        peak = max(peak, float(np.abs(y[start:start + block_size]).max()))
+    if peak > np.finfo(np.float32).tiny:
+        y /= peak
+    return y
+
+
+def _iter_enhanced_blocks(audio_path, sr, block_seconds, coef):
+    """Yield mono, resampled, pre-emphasized blocks of a file.
+
+    The resampler and the pre-emphasis filter carry their state from one block
+    to the next, so the concatenated output matches processing the whole file
+    at once while only one block is ever held in memory.
+    """
+    import librosa
+    import soundfile as sf
+    import soxr
+
+    with sf.SoundFile(audio_path) as audio_file:
+        file_sr = audio_file.samplerate
+        resampler = soxr.ResampleStream(file_sr, sr, 1, dtype="float32") if file_sr != sr else None
+        zi = None
+        blocks = audio_file.blocks(blocksize=int(block_seconds * file_sr), dtype="float32", always_2d=True)
+        block = next(blocks, None)
+        while block is not None:
+            next_block = next(blocks, None)
+            samples = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+            if resampler is not None:
+                samples = resampler.resample_chunk(samples, last=next_block is None)
+            if len(samples) > 1 or (zi is not None and len(samples)):
+                samples, zi = librosa.effects.preemphasis(samples, coef=coef, zi=zi, return_zf=True)
+                yield samples.astype(np.float32, copy=False)
+            block = next_block
+
+
+def scan_audio_peak(audio_path, sr=WHISPER_SAMPLE_RATE, block_seconds=30.0, coef=0.97):
+    """First pass over a file: return (peak, n_samples) of the enhanced 16 kHz signal."""
+    peak = 0.0
+    n_samples = 0
+    for block in _iter_enhanced_blocks(audio_path, sr, block_seconds, coef):
+        peak = max(peak, float(np.abs(block).max()))
+        n_samples += len(block)
+    return peak, n_samples
+
+
+def iter_preprocessed_audio(audio_path, sr=WHISPER_SAMPLE_RATE, block_seconds=30.0, coef=0.97, peak=None):
+    """Stream a file as enhanced (pre-emphasized, peak-normalized) 16 kHz blocks.
+
+    Reads with ``soundfile`` one block at a time, so RAM stays bounded by the
+    block size however long the recording is. The normalization peak comes
+    from a first pass over the file unless ``peak`` is given.
+    """
+    if peak is None:
+        peak, _ = scan_audio_peak(audio_path, sr, block_seconds, coef)
+    scale = 1.0 / peak if peak > np.finfo(np.float32).tiny else 1.0
+    for block in _iter_enhanced_blocks(audio_path, sr, block_seconds, coef):
+        block *= scale
+        yield block
+
+
+def preprocess_audio_to_file(audio_path, output_path, sr=WHISPER_SAMPLE_RATE, block_seconds=30.0):
+    """Write the enhanced 16 kHz signal of ``audio_path`` to a WAV file block by block."""
+    import soundfile as sf
+
+    with sf.SoundFile(output_path, "w", samplerate=sr, channels=1, subtype="FLOAT") as output_file:
+        for block in iter_preprocessed_audio(audio_path, sr, block_seconds):
+            output_file.write(block)
+    return output_path
+
+
+def get_ffmpeg_executable():
+    """Path of an ffmpeg binary: the system one, or the one bundled with imageio-ffmpeg."""
+    import shutil
+
+    executable = shutil.which("ffmpeg")
+    if executable:
+        return executable
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return None
+
+
+def iter_ffmpeg_audio(media_path, sr=WHISPER_SAMPLE_RATE, block_seconds=30.0):
+    """Decode the audio track of any container through an ffmpeg pipe.
+
+    ffmpeg downmixes and resamples to mono ``sr`` float32 PCM on its stdout,
+    which is read in fixed-size blocks, so neither the video nor a full-rate
+    WAV is ever materialized.
+    """
+    import subprocess
+    import tempfile
+
+    executable = get_ffmpeg_executable()
+    if executable is None:
+        raise FileNotFoundError("ffmpeg not found")
+
+    command = [
+        executable, "-nostdin", "-loglevel", "error",
+        "-i", media_path,
+        "-vn", "-ac", "1", "-ar", str(sr),
+        "-f", "f32le", "pipe:1",
+    ]
+    block_bytes = int(block_seconds * sr) * 4
+    # stderr goes to a file rather than a pipe: a chatty ffmpeg could fill the
+    # pipe and block while this side is still waiting on stdout
+    with tempfile.TemporaryFile() as error_file:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=error_file)
+        try:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                # An odd trailing byte count can only come from a truncated stream
+                usable = len(data) - len(data) % 4
+                yield np.frombuffer(data[:usable], dtype=np.float32)
+            if process.wait() != 0:
+                # Only the end matters; earlier lines are usually repeats
+                error_file.seek(max(0, error_file.seek(0, 2) - 2000))
+                errors = "\n".join(error_file.read().decode(errors="replace").strip().splitlines()[-10:])
+                raise RuntimeError(f"ffmpeg failed: {errors or process.returncode}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+
+def extract_audio_ffmpeg(media_path, output_path, sr=WHISPER_SAMPLE_RATE):
+    """Write the audio track of ``media_path`` as a mono ``sr`` WAV, streaming through ffmpeg."""
+    import soundfile as sf
+
+    with sf.SoundFile(output_path, "w", samplerate=sr, channels=1, subtype="FLOAT") as output_file:
+        for block in iter_ffmpeg_audio(media_path, sr):
+            output_file.write(block)
+    return output_path
+
+
+def result_words(result, offset_s=0.0):
+    """Convert a pipeline result into words with absolute timestamps."""
+    words = []
+    for chunk in result.get("chunks") or []:
+        start, end = chunk.get("timestamp") or (None, None)
+        if start is None:
+            continue
+        if end is None:
+            end = start
+        words.append({"text": chunk["text"], "start": offset_s + start, "end": offset_s + end})
+    return words
+
+
+def _merge_text_overlap(previous_words, new_words, max_overlap=30):
+    """Drop the longest prefix of ``new_words`` that repeats the tail of ``previous_words``."""
+    def normalize(word):
+        return word.strip().lower().strip(".,!?;:")
+
+    prev = [normalize(w) for w in previous_words[-max_overlap:]]
+    new = [normalize(w) for w in new_words[:max_overlap]]
+    for size in range(min(len(prev), len(new)), 0, -1):
+        if prev[-size:] == new[:size]:
+            return new_words[size:]
+    return new_words
+
+
+def stitch_window_results(windows, window_s, overlap_s):
+    """Stitch per-window pipeline results into a single list of words.
+
+    ``windows`` is a sequence of (start_seconds, result, is_last). Each window
+    owns the span between the midpoints of its overlaps with its neighbours, and
+    only words whose midpoint falls inside that span are kept, so words
+    transcribed twice at a seam appear once. Windows without word timestamps
+    fall back to matching repeated words at the seam.
+    """
+    stitched = []
+    half_overlap = overlap_s / 2.0
+    for index, (start_s, result, is_last) in enumerate(windows):
+        words = result_words(result, start_s)
+        if words:
+            owned_start = start_s + half_overlap if index > 0 else float("-inf")
+            owned_end = start_s + window_s - half_overlap if not is_last else float("inf")
+            for word in words:
+                midpoint = (word["start"] + word["end"]) / 2.0
+                if owned_start <= midpoint < owned_end:
+                    stitched.append(word)
+        else:
+            text_words = result.get("text", "").split()
+            previous = [word["text"] for word in stitched]
+            for text in _merge_text_overlap(previous, text_words):
+                stitched.append({"text": f" {text}", "start": start_s, "end": start_s})
+    return stitched
+
+
+def words_to_text(words):
+    """Join stitched words back into a transcript string."""
+    text = "".join(word["text"] if word["text"].startswith(" ") else f" {word['text']}" for word in words)
+    return " ".join(text.split())
+
+
+def window_starts(total_s, window_s=30.0, overlap_s=5.0):
+    """Start times of the overlapping windows that cover ``total_s`` seconds."""
+    if overlap_s >= window_s:
+        raise ValueError("overlap_s must be smaller than window_s")
+    starts = []
+    start = 0.0
+    while True:
+        starts.append(start)
+        if start + window_s >= total_s:
+            return starts
+        start += window_s - overlap_s
+
+
+def read_audio_window(audio_path, start_s, window_s=30.0, sr=WHISPER_SAMPLE_RATE):
+    """Read a single mono window of a file (or slice a 16 kHz array), resampled to ``sr``."""
+    if isinstance(audio_path, np.ndarray):
+        first = int(round(start_s * sr))
+        return audio_path[first:first + int(window_s * sr)]
+
+    import soundfile as sf
+
+    with sf.SoundFile(audio_path) as audio_file:
+        file_sr = audio_file.samplerate
+        audio_file.seek(int(start_s * file_sr))
+        block = audio_file.read(int(window_s * file_sr), dtype="float32", always_2d=True)
+    samples = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+    if file_sr != sr:
+        import librosa
+        samples = librosa.resample(samples, orig_sr=file_sr, target_sr=sr)
+    return np.ascontiguousarray(samples, dtype=np.float32)
+
+
+def transcribe_window_batch(transcriber, batch, batch_size=4):
+    """Run one batch of (start_seconds, samples) windows through the pipeline.
+
+    Returns a list of (start_seconds, result) in the same order.
+    """
+    inputs = [{"raw": samples, "sampling_rate": WHISPER_SAMPLE_RATE} for _, samples in batch]
+    outputs = transcriber(inputs, batch_size=batch_size, return_timestamps="word")
+    return [(start_s, output) for (start_s, _), output in zip(batch, outputs)]
+
+
+def transcribe_in_windows(transcriber, audio_path, window_s=30.0, overlap_s=5.0, batch_size=4,
+                          progress_callback=None):
+    """Transcribe a long recording window by window in batches.
+
+    Windows are read lazily and fed to the pipeline ``batch_size`` at a time, so
+    peak memory is bounded by one batch regardless of the recording length.
+    ``progress_callback(done_seconds, total_seconds)`` is called after every batch.
+    """
+    total_s = get_audio_duration(audio_path)
+    results = []
+    batch = []
+
+    def run_batch(is_final):
+        outputs = transcribe_window_batch(transcriber, batch, batch_size)
+        for position, (start_s, output) in enumerate(outputs):
+            is_last = is_final and position == len(outputs) - 1
+            results.append((start_s, output, is_last))
+        if progress_callback:
+            done_s = min(batch[-1][0] + window_s, total_s)
+            progress_callback(done_s, total_s)
+        batch.clear()
+
+    windows = iter_audio_windows(audio_path, window_s, overlap_s)
+    pending = next(windows, None)
+    while pending is not None:
+        batch.append(pending)
+        pending = next(windows, None)
+        if len(batch) == batch_size or pending is None:
+            run_batch(is_final=pending is None)
+
+    return stitch_window_results(results, window_s, overlap_s)
+
+
+def _runs(mask):
+    """Return (start, end) index pairs of the True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _frame_features(frames):
+    """RMS energy and zero-crossing rate of each row of a (n_frames, frame_length) view."""
+    frame_length = frames.shape[1]
+    energy = np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_length)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+    return energy, zcr
+
+
+def _classify_frames(energy, zcr, frame_ms=30, energy_ratio=3.0, max_zcr=0.25,
+                     min_speech_ms=250, min_silence_ms=400, pad_ms=200):
+    """Turn per-frame features into a smoothed speech mask."""
+    n_frames = len(energy)
+    noise_floor = np.percentile(energy, 10)
+    threshold = max(noise_floor * energy_ratio, float(energy.max()) * 0.02, 1e-4)
+    speech = (energy > threshold) & ((zcr < max_zcr) | (energy > 2 * threshold))
+
+    # Bridge short silences, then drop speech blips that are still too short
+    min_silence = max(1, min_silence_ms // frame_ms)
+    starts, ends = _runs(~speech)
+    for start, end in zip(starts, ends):
+        if end - start < min_silence and start > 0 and end < n_frames:
+            speech[start:end] = True
+    min_speech = max(1, min_speech_ms // frame_ms)
+    starts, ends = _runs(speech)
+    for start, end in zip(starts, ends):
+        if end - start < min_speech:
+            speech[start:end] = False
+
+    # Pad every speech region on both sides
+    pad = pad_ms // frame_ms
+    if pad:
+        starts, ends = _runs(speech)
+        for start, end in zip(starts, ends):
+            speech[max(0, start - pad):min(n_frames, end + pad)] = True
+    return speech
+
+
+def detect_speech_frames(y, sr=WHISPER_SAMPLE_RATE, frame_ms=30, **vad_options):
+    """Classify fixed frames of a signal as speech or non-speech.
+
+    A frame counts as speech when its RMS energy is well above the estimated
+    noise floor and its zero-crossing rate is speech-like (broadband hiss has a
+    high ZCR at low energy). Short gaps are bridged, short blips dropped and the
+    remaining regions padded so word onsets are not clipped. Everything is
+    computed on a strided view of the signal, without Python loops over samples.
+    Returns (speech_mask, frame_length).
+    """
+    frame_length = max(1, int(sr * frame_ms / 1000))
+    n_frames = len(y) // frame_length
+    if n_frames == 0:
+        return np.ones(1, dtype=bool), len(y) or 1
+
+    frames = y[:n_frames * frame_length].reshape(n_frames, frame_length)
+    energy, zcr = _frame_features(frames)
+    speech = _classify_frames(energy, zcr, frame_ms, **vad_options)
+
+    # Keep the trailing partial frame with the last full frame
+    if len(y) % frame_length:
+        speech = np.append(speech, speech[-1])
+    return speech, frame_length
+
+
+def apply_vad(y, sr=WHISPER_SAMPLE_RATE, **vad_options):
+    """Cut non-speech regions out of a signal.
+
+    Returns (speech_audio, offset_map, stats). ``offset_map`` holds one
+    (speech_start_s, original_start_s, duration_s) entry per kept region so
+    timestamps on the shortened audio can be mapped back with
+    ``map_to_original_time``. If no speech is found the signal is returned as is.
+    """
+    total_s = len(y) / float(sr)
+    speech, frame_length = detect_speech_frames(y, sr, **vad_options)
+    starts, ends = _runs(speech)
+    if len(starts) == 0:
+        return y, [(0.0, 0.0, total_s)], {"total_seconds": total_s, "skipped_seconds": 0.0, "regions": 1}
+
+    pieces = []
+    offset_map = []
+    speech_position = 0
+    for start, end in zip(starts, ends):
+        first = int(start) * frame_length
+        last = min(len(y), int(end) * frame_length)
+        pieces.append(y[first:last])
+        offset_map.append((speech_position / float(sr), first / float(sr), (last - first) / float(sr)))
+        speech_position += last - first
+
+    speech_audio = np.concatenate(pieces) if len(pieces) > 1 else pieces[0].copy()
+    stats = {
+        "total_seconds": total_s,
+        "skipped_seconds": total_s - speech_position / float(sr),
+        "regions": len(offset_map),
+    }
+    return speech_audio, offset_map, stats
+
+
+def _map_time(t, speech_starts, offset_map):
+    index = bisect.bisect_right(speech_starts, t) - 1
+    speech_start, original_start, _ = offset_map[max(index, 0)]
+    return original_start + (t - speech_start)
+
+
+def map_to_original_time(t, offset_map):
+    """Map a timestamp on VAD-trimmed audio back to the original recording."""
+    if not offset_map:
+        return t
+    return _map_time(t, [entry[0] for entry in offset_map], offset_map)
+
+
+def map_words_to_original(words, offset_map):
+    """Rewrite word timestamps in place so they point at the original audio."""
+    if not offset_map:
+        return words
+    speech_starts = [entry[0] for entry in offset_map]
+    for word in words:
+        word["start"] = _map_time(word["start"], speech_starts, offset_map)
+        word["end"] = _map_time(word["end"], speech_starts, offset_map)
+    return words
+
+
+def apply_vad_to_file(audio_path, output_path, sr=WHISPER_SAMPLE_RATE, frame_ms=30, block_seconds=60.0,
+                      **vad_options):
+    """Streaming variant of ``apply_vad`` for 16 kHz files too long to load at once.
+
+    The first pass reads the file block by block and keeps only per-frame
+    features; the second copies the speech regions to ``output_path``. Returns
+    (offset_map, stats); ``output_path`` is only written if something was skipped.
+    """
+    import soundfile as sf
+
+    frame_length = max(1, int(sr * frame_ms / 1000))
+    block_frames = max(1, int(block_seconds * sr) // frame_length) * frame_length
+
+    energies, zcrs = [], []
+    with sf.SoundFile(audio_path) as audio_file:
+        total_samples = audio_file.frames
+        for block in audio_file.blocks(blocksize=block_frames, dtype="float32", always_2d=True):
+            samples = block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0]
+            n_frames = len(samples) // frame_length
+            if n_frames:
+                energy, zcr = _frame_features(samples[:n_frames * frame_length].reshape(n_frames, frame_length))
+                energies.append(energy)
+                zcrs.append(zcr)
+
+    total_s = total_samples / float(sr)
+    if not energies:
+        return [(0.0, 0.0, total_s)], {"total_seconds": total_s, "skipped_seconds": 0.0, "regions": 1}
+
+    speech = _classify_frames(np.concatenate(energies), np.concatenate(zcrs), frame_ms, **vad_options)
+    if total_samples % frame_length:
+        speech = np.append(speech, speech[-1])
+    starts, ends = _runs(speech)
+    kept_samples = sum(min(total_samples, int(end) * frame_length) - int(start) * frame_length
+                       for start, end in zip(starts, ends))
+    if len(starts) == 0 or kept_samples >= total_samples:
+        return [(0.0, 0.0, total_s)], {"total_seconds": total_s, "skipped_seconds": 0.0, "regions": 1}
+
+    offset_map = []
+    speech_position = 0
+    with sf.SoundFile(audio_path) as audio_file, \
+            sf.SoundFile(output_path, "w", samplerate=sr, channels=1, subtype="FLOAT") as output_file:
+        for start, end in zip(starts, ends):
+            first = int(start) * frame_length
+            last = min(total_samples, int(end) * frame_length)
+            audio_file.seek(first)
+            remaining = last - first
+            while remaining > 0:
+                block = audio_file.read(min(remaining, block_frames), dtype="float32", always_2d=True)
+                if not len(block):
+                    break
+                output_file.write(block.mean(axis=1, dtype=np.float32) if block.shape[1] > 1 else block[:, 0])
+                remaining -= len(block)
+            offset_map.append((speech_position / float(sr), first / float(sr), (last - first) / float(sr)))
+            speech_position += last - first
+
+    stats = {
+        "total_seconds": total_s,
+        "skipped_seconds": total_s - speech_position / float(sr),
+        "regions": len(offset_map),
+    }
+    return offset_map, stats
@@ -0,0 +1,831 @@
+"""Performance benchmarks for the transcription and summarization pipeline.
+
+Run a benchmark from the command line, for example:
+
+    python benchmarks.py parallel --minutes 30 --model tiny
+    python benchmarks.py quantization --sizes tiny base small
+    python benchmarks.py importtime --budget-ms 1500
+    python benchmarks.py video --size-mb 1024
+    python benchmarks.py pdf --pages 500
+    python benchmarks.py docx --pages 300
+    python benchmarks.py txt --size-mb 200
+    python benchmarks.py llm --latency 1.5
+    python benchmarks.py langid
+"""
+import argparse
+import io
+import os
+import re
+import subprocess
+import sys
+import shutil
+import tempfile
+import time
+
+
+def generate_synthetic_audio(path, minutes=30, sr=16000, block_seconds=60, seed=0):
+    """Write a synthetic speech-like recording block by block.
+
+    Amplitude-modulated tones with noise bursts and short pauses give Whisper
+    something to decode without needing a bundled recording.
+    """
+    import numpy as np
+    import soundfile as sf
+
+    rng = np.random.default_rng(seed)
+    total_frames = int(minutes * 60 * sr)
+    block_frames = int(block_seconds * sr)
+    with sf.SoundFile(path, "w", samplerate=sr, channels=1, subtype="PCM_16") as audio_file:
+        written = 0
+        while written < total_frames:
+            frames = min(block_frames, total_frames - written)
+            t = (np.arange(frames) + written) / sr
+            pitch = 120 + 80 * np.sin(2 * np.pi * 0.3 * t)
+            envelope = (np.sin(2 * np.pi * 3.0 * t) > -0.2).astype(np.float32)
+            block = 0.3 * np.sin(2 * np.pi * pitch * t) * envelope
+            block += 0.02 * rng.standard_normal(frames)
+            audio_file.write(block.astype(np.float32))
+            written += frames
+    return path
+
+
+def bench_parallel_transcription(minutes=30, model_size="tiny", workers=None, batch_size=4):
+    """Compare wall-clock transcription time for different worker counts."""
+    from parallel_transcription import transcribe_parallel
+
+    cpu_count = os.cpu_count() or 1
+    if workers is None:
+        workers = sorted({1, 2, 4, cpu_count})
+    workers = [count for count in workers if count <= cpu_count]
+
+    work_dir = tempfile.mkdtemp()
+    audio_path = generate_synthetic_audio(os.path.join(work_dir, "synthetic_meeting.wav"), minutes=minutes)
+    warm_path = generate_synthetic_audio(os.path.join(work_dir, "warmup.wav"), minutes=0.1)
+    audio_seconds = minutes * 60
+
+    print(f"Synthetic {minutes} min recording, Whisper {model_size}, {cpu_count} cores")
+    print(f"{'workers':>8} {'load (s)':>10} {'transcribe (s)':>15} {'RTF':>8} {'speedup':>8}")
+    baseline = None
+    try:
+        for count in workers:
+            # Warm the pool on a short clip so the model load is reported separately
+            start = time.perf_counter()
+            transcribe_parallel(warm_path, model_size, count, batch_size=batch_size)
+            load_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            transcribe_parallel(audio_path, model_size, count, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+
+            baseline = baseline or elapsed
+            print(f"{count:>8} {load_seconds:>10.1f} {elapsed:>15.1f} "
+                  f"{elapsed / audio_seconds:>8.3f} {baseline / elapsed:>7.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _normalize_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level Levenshtein distance divided by the reference length."""
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,  # deletion
+                current[j - 1] + 1,  # insertion
+                previous[j - 1] + (ref_word != hyp_word),  # substitution
+            )
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+
+def load_test_clips(clip_path=None, reference_path=None, num_clips=8):
+    """Return (samples, sampling_rate, reference_text) test clips.
+
+    A local clip and reference transcript can be given; otherwise the LibriSpeech
+    sample set used by the Transformers test-suite is fetched from the Hub.
+    """
+    if clip_path:
+        import librosa
+
+        samples, sr = librosa.load(clip_path, sr=16000)
+        with open(reference_path, encoding="utf-8") as reference_file:
+            return [(samples, sr, reference_file.read())]
+
+    from datasets import load_dataset
+
+    dataset = load_dataset("hf-internal-testing/librispeech_asr_dummy", "clean", split="validation")
+    clips = []
+    for sample in dataset.select(range(min(num_clips, len(dataset)))):
+        audio = sample["audio"]
+        clips.append((audio["array"], audio["sampling_rate"], sample["text"]))
+    return clips
+
+
+def bench_quantization(sizes=("tiny", "base", "small"), clip_path=None, reference_path=None):
+    """Compare int8 dynamic quantization against fp32 on CPU.
+
+    Reports word error rate, real-time factor (processing time / audio time) and
+    estimated model memory for each size, plus the WER delta of int8 vs fp32.
+    """
+    from model_registry import WhisperModelRegistry, _estimate_model_bytes
+
+    clips = load_test_clips(clip_path, reference_path)
+    audio_seconds = sum(len(samples) / sr for samples, sr, _ in clips)
+    reference = " ".join(text for _, _, text in clips)
+    print(f"{len(clips)} clip(s), {audio_seconds:.1f}s of audio")
+    print(f"{'model':>8} {'dtype':>8} {'WER':>7} {'dWER':>7} {'RTF':>7} {'speedup':>8} {'MB':>7}")
+
+    for size in sizes:
+        fp32_wer = fp32_elapsed = None
+        for dtype in ("float32", "int8"):
+            # A fresh registry per run so the models are not kept alive side by side
+            transcriber = WhisperModelRegistry().get_pipeline(size, "cpu", dtype)
+            transcriber({"raw": clips[0][0], "sampling_rate": clips[0][1]})  # Warm-up
+
+            start = time.perf_counter()
+            hypothesis = " ".join(
+                transcriber({"raw": samples, "sampling_rate": sr})["text"] for samples, sr, _ in clips
+            )
+            elapsed = time.perf_counter() - start
+
+            wer = word_error_rate(reference, hypothesis)
+            if dtype == "float32":
+                fp32_wer, fp32_elapsed = wer, elapsed
+            print(f"{size:>8} {dtype:>8} {wer:>7.3f} {wer - fp32_wer:>+7.3f} "
+                  f"{elapsed / audio_seconds:>7.3f} {fp32_elapsed / elapsed:>7.2f}x "
+                  f"{_estimate_model_bytes(transcriber) / (1024 * 1024):>7.0f}")
+            del transcriber
+
+
+def measure_import_time(module="main"):
+    """Import ``module`` in a fresh interpreter under ``-X importtime``.
+
+    Returns (total_seconds, [(cumulative_seconds, package), ...]) with the
+    slowest top-level imports first.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    top_level = []
+    for line in completed.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)", line)
+        # Nested imports are indented under their parent; only count top-level ones
+        if match and not match.group(2):
+            top_level.append((int(match.group(1)) / 1e6, match.group(3)))
+    top_level.sort(reverse=True)
+    return sum(seconds for seconds, _ in top_level), top_level
+
+
+def bench_import_time(budget_ms=1500, module="main", show=15):
+    """Report cold-start import cost and fail if it exceeds the budget."""
+    total, imports = measure_import_time(module)
+    print(f"Cold import of {module}: {total * 1000:.0f} ms (budget {budget_ms} ms)")
+    for seconds, package in imports[:show]:
+        print(f"{seconds * 1000:>10.1f} ms  {package}")
+    if total * 1000 > budget_ms:
+        print("FAIL: import time over budget")
+        return 1
+    return 0
+
+
+def generate_synthetic_video(path, size_mb=1024):
+    """Encode a lossless test-pattern video with a stereo 48 kHz tone until it reaches ``size_mb``."""
+    from audio_utils import get_ffmpeg_executable
+
+    subprocess.run(
+        [
+            get_ffmpeg_executable(), "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", "testsrc2=size=1920x1080:rate=30",
+            "-f", "lavfi", "-i", "sine=frequency=220:sample_rate=48000",
+            "-c:v", "libx264", "-preset", "ultrafast", "-qp", "0",
+            "-c:a", "aac", "-ac", "2",
+            "-t", "3600", "-fs", str(int(size_mb * 1024 * 1024)),
+            path,
+        ],
+        check=True,
+    )
+    return path
+
+
+class _BenchmarkUpload(io.BytesIO):
+    """Stands in for a Streamlit UploadedFile, which is an in-memory BytesIO."""
+
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            super().__init__(source.read())
+        self.name = os.path.basename(path)
+
+
+def _extract_video_moviepy(video_path):
+    """The previous video path: getvalue() copy, MoviePy full-rate WAV, librosa resample."""
+    import librosa
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+    upload = _BenchmarkUpload(video_path)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_video:
+        tmp_video.write(upload.getvalue())
+    audio_path = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
+    try:
+        video = VideoFileClip(tmp_video.name)
+        video.audio.write_audiofile(audio_path, logger=None)
+        video.close()
+        samples, _ = librosa.load(audio_path, sr=16000)
+        return len(samples)
+    finally:
+        os.unlink(tmp_video.name)
+        os.unlink(audio_path)
+
+
+def _extract_video_ffmpeg(video_path):
+    """The streaming path: chunked spool to disk, ffmpeg pipe to 16 kHz mono."""
+    from audio_utils import iter_ffmpeg_audio
+
+    upload = _BenchmarkUpload(video_path)
+    upload.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as tmp_video:
+        shutil.copyfileobj(upload, tmp_video, 8 * 1024 * 1024)
+    try:
+        return sum(len(block) for block in iter_ffmpeg_audio(tmp_video.name))
+    finally:
+        os.unlink(tmp_video.name)
+
+
+def _run_measured(function, video_path, queue):
+    import resource
+
+    try:
+        start = time.perf_counter()
+        n_samples = function(video_path)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        queue.put(e)
+        return
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # ru_maxrss is in KiB on Linux
+    queue.put((elapsed, peak_mb, n_samples))
+
+
+def bench_video_extraction(size_mb=1024):
+    """Compare wall time and peak RSS of the MoviePy and ffmpeg-pipe video paths.
+
+    Each path runs in a fresh process so its peak memory is measured in isolation.
+    """
+    import multiprocessing
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        video_path = generate_synthetic_video(os.path.join(work_dir, "synthetic.mp4"), size_mb)
+        actual_mb = os.path.getsize(video_path) / (1024 * 1024)
+        print(f"Synthetic video: {actual_mb:.0f} MB")
+        print(f"{'path':>10} {'time (s)':>10} {'peak RSS (MB)':>14} {'16k samples':>12}")
+
+        context = multiprocessing.get_context("spawn")
+        for label, function in (("moviepy", _extract_video_moviepy), ("ffmpeg", _extract_video_ffmpeg)):
+            queue = context.Queue()
+            process = context.Process(target=_run_measured, args=(function, video_path, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            if isinstance(result, Exception):
+                print(f"{label:>10} failed: {result}")
+                continue
+            elapsed, peak_mb, n_samples = result
+            print(f"{label:>10} {elapsed:>10.1f} {peak_mb:>14.0f} {n_samples:>12}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def generate_synthetic_pdf(path, pages=500, lines_per_page=45, seed=0):
+    """Write a text-heavy PDF of ``pages`` pages of pseudo-random board-pack prose."""
+    import random
+    from fpdf import FPDF
+
+    rng = random.Random(seed)
+    vocabulary = ("revenue quarter board approve motion budget forecast risk committee "
+                  "audit capital growth margin strategy review action item minutes").split()
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page in range(pages):
+        pdf.add_page()
+        for _ in range(lines_per_page):
+            pdf.cell(0, 6, " ".join(rng.choice(vocabulary) for _ in range(14)), ln=1)
+    pdf.output(path)
+    return path
+
+
+def bench_pdf_extraction(pages=500, workers=None):
+    """Compare serial and page-parallel PDF extraction on a synthetic document."""
+    from document_extraction import extract_pdf_text, slowest_pages
+
+    workers = workers or sorted({1, 2, 4, os.cpu_count() or 1})
+    work_dir = tempfile.mkdtemp()
+    try:
+        pdf_path = generate_synthetic_pdf(os.path.join(work_dir, "synthetic.pdf"), pages)
+        print(f"Synthetic PDF: {pages} pages, {os.path.getsize(pdf_path) / (1024 * 1024):.1f} MB")
+        print(f"{'workers':>8} {'time (s)':>10} {'speedup':>8} {'slowest page (s)':>17}")
+
+        baseline = None
+        reference_text = None
+        for num_workers in workers:
+            # Warm the pool first so worker startup isn't billed to the document
+            extract_pdf_text(pdf_path, num_workers, min_parallel_pages=1)
+            text, stats = extract_pdf_text(pdf_path, num_workers, min_parallel_pages=1)
+            if reference_text is None:
+                reference_text = text
+            elif text != reference_text:
+                print(f"{num_workers:>8} text differs from the serial extraction")
+            baseline = baseline or stats["seconds"]
+            _, slowest_seconds = slowest_pages(stats, 1)[0]
+            print(f"{num_workers:>8} {stats['seconds']:>10.2f} {baseline / stats['seconds']:>7.2f}x "
+                  f"{slowest_seconds:>17.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def generate_synthetic_docx(path, pages=300, seed=0):
+    """Write a DOCX of roughly ``pages`` pages: prose paragraphs, a table per page, a header and footer."""
+    import random
+    from docx import Document
+
+    rng = random.Random(seed)
+    vocabulary = ("revenue quarter board approve motion budget forecast risk committee "
+                  "audit capital growth margin strategy review action item minutes").split()
+    document = Document()
+    document.sections[0].header.paragraphs[0].text = "Board pack - confidential"
+    document.sections[0].footer.paragraphs[0].text = "Prepared for the quarterly review"
+    for page in range(pages):
+        document.add_heading(f"Section {page + 1}", level=2)
+        for _ in range(6):
+            document.add_paragraph(" ".join(rng.choice(vocabulary) for _ in range(60)))
+        table = document.add_table(rows=4, cols=3)
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text = " ".join(rng.choice(vocabulary) for _ in range(4))
+    document.save(path)
+    return path
+
+
+def bench_docx_extraction(pages=300, repeats=3):
+    """Compare python-docx paragraph extraction with the streaming XML extractor."""
+    from docx import Document
+    from document_extraction import iter_docx_text, join_segments
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        docx_path = generate_synthetic_docx(os.path.join(work_dir, "synthetic.docx"), pages)
+        print(f"Synthetic DOCX: ~{pages} pages, {os.path.getsize(docx_path) / (1024 * 1024):.1f} MB")
+
+        def python_docx(path):
+            # The previous path: full object tree, body paragraphs only
+            return "\n".join(para.text for para in Document(path).paragraphs if para.text)
+
+        def streaming(path):
+            return "".join(join_segments(iter_docx_text(path)))
+
+        print(f"{'extractor':>12} {'best (s)':>10} {'words':>10}")
+        for label, extract in (("python-docx", python_docx), ("iterparse", streaming)):
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                text = extract(docx_path)
+                best = min(best, time.perf_counter() - start)
+            print(f"{label:>12} {best:>10.2f} {len(text.split()):>10}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def generate_synthetic_log(path, size_mb=200, encoding="utf-8", seed=0):
+    """Write a meeting-log style text file of about ``size_mb`` in ``encoding``."""
+    import random
+
+    rng = random.Random(seed)
+    speakers = ["Renée", "José", "Zoë", "Ana", "Björn"]
+    vocabulary = "café revenue budget forecast risk naïve résumé action item decision follow-up".split()
+    target = int(size_mb * 1024 * 1024)
+    with open(path, "w", encoding=encoding, newline="\n") as log:
+        written = 0
+        line_number = 0
+        while written < target:
+            lines = []
+            for _ in range(1000):
+                line_number += 1
+                words = " ".join(rng.choice(vocabulary) for _ in range(12))
+                lines.append(f"[{line_number:08d}] {rng.choice(speakers)}: {words}\n")
+            block = "".join(lines)
+            log.write(block)
+            written += len(block.encode(encoding))
+    return path
+
+
+def _ingest_txt_readall(path):
+    """The previous TXT path: read() a copy of the upload's bytes, then decode and split it."""
+    import hashlib
+
+    text = _BenchmarkUpload(path).read().decode("utf-8")
+    hashlib.sha256(text.encode()).hexdigest()
+    return len(text.split())
+
+
+def _ingest_txt_buffer(path):
+    """The new TXT path: decode the upload's buffer in place and measure it in slices."""
+    from document_extraction import decode_text_buffer, measure_text
+
+    upload = _BenchmarkUpload(path)
+    with upload.getbuffer() as buffer:
+        text, _ = decode_text_buffer(buffer)
+    return measure_text(text)["words"]
+
+
+def bench_txt_ingestion(size_mb=200):
+    """Compare wall time and peak RSS of the old and new TXT ingestion paths."""
+    import multiprocessing
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        log_path = generate_synthetic_log(os.path.join(work_dir, "meeting.log"), size_mb)
+        print(f"Synthetic log: {os.path.getsize(log_path) / (1024 * 1024):.0f} MB")
+        print(f"{'path':>10} {'time (s)':>10} {'peak RSS (MB)':>14} {'words':>12}")
+
+        context = multiprocessing.get_context("spawn")
+        for label, function in (("read()", _ingest_txt_readall), ("buffer", _ingest_txt_buffer)):
+            queue = context.Queue()
+            process = context.Process(target=_run_measured, args=(function, log_path, queue))
+            process.start()
+            result = queue.get()
+            process.join()
+            if isinstance(result, Exception):
+                print(f"{label:>10} failed: {result}")
+                continue
+            elapsed, peak_mb, words = result
+            print(f"{label:>10} {elapsed:>10.1f} {peak_mb:>14.0f} {words:>12}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class FakeLLMClient:
+    """Stands in for the Groq client: sleeps ``latency`` seconds per call, then returns a canned reply.
+
+    With ``stream=True`` the reply is streamed word by word instead: the first
+    word after ``first_token_fraction`` of the latency, the rest spread over
+    the remainder.
+    """
+
+    def __init__(self, latency=1.5, reply="Positive. The team agreed on the budget and next steps.",
+                 first_token_fraction=0.2):
+        from types import SimpleNamespace
+
+        def stream():
+            words = re.findall(r"\S+\s*", reply)
+            time.sleep(latency * first_token_fraction)
+            for index, word in enumerate(words):
+                if index:
+                    time.sleep(latency * (1 - first_token_fraction) / max(1, len(words) - 1))
+                delta = SimpleNamespace(content=word)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        def create(stream=False, **kwargs):
+            if stream:
+                return stream_reply()
+            time.sleep(latency)
+            message = SimpleNamespace(content=reply)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        stream_reply = stream
+
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def bench_llm_pipeline(latency=1.5, news_latency=0.5, target_language="Spanish"):
+    """End-to-end latency of summary, sentiment, translations and news: sequential, concurrent and streamed."""
+    # Measure the calls themselves, not cache hits or the rate limiter
+    os.environ["LLM_CACHE_TTL_HOURS"] = "0"
+    os.environ["GROQ_REQUESTS_PER_MINUTE"] = "100000"
+    os.environ["GROQ_TOKENS_PER_MINUTE"] = "100000000"
+    from transcription_and_summarization import (
+        analyze_sentiment,
+        stream_summary_and_analysis,
+        summarize_and_analyze,
+        summarize_text_groq,
+        translate_to_language,
+    )
+
+    client = FakeLLMClient(latency)
+    transcript = "We reviewed the quarterly budget and agreed on the hiring plan. " * 40
+
+    def fetch_news(summary):
+        time.sleep(news_latency)
+        return []
+
+    start = time.perf_counter()
+    summary_english = summarize_text_groq(transcript, client)
+    sentiment_english = analyze_sentiment(transcript, client, "standard")
+    translate_to_language(summary_english, target_language, client)
+    translate_to_language(sentiment_english, target_language, client)
+    fetch_news(summary_english)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    summarize_and_analyze(transcript, client, target_language, "standard", related_news_fetcher=fetch_news)
+    concurrent = time.perf_counter() - start
+
+    # Consume the streams the way the page renders them: summary first, then sentiment
+    start = time.perf_counter()
+    first_text = None
+    analysis = stream_summary_and_analysis(transcript, client, target_language, "standard",
+                                           related_news_fetcher=fetch_news)
+    for name in ("summary_english", "summary", "sentiment_english", "sentiment"):
+        for delta in analysis[name]:
+            if first_text is None and delta:
+                first_text = time.perf_counter() - start
+    analysis["related_news"].result()
+    streamed = time.perf_counter() - start
+
+    print(f"Fake LLM latency {latency:.1f}s per call, news {news_latency:.1f}s")
+    print(f"{'pipeline':>12} {'first text (s)':>15} {'total (s)':>10}")
+    # The blocking pipelines show nothing until they are done
+    print(f"{'sequential':>12} {sequential:>15.2f} {sequential:>10.2f}")
+    print(f"{'concurrent':>12} {concurrent:>15.2f} {concurrent:>10.2f}  ({sequential / concurrent:.1f}x faster)")
+    print(f"{'streamed':>12} {first_text:>15.2f} {streamed:>10.2f}")
+
+
+# One sentence per language identified by its script
+_SCRIPT_SAMPLES = {
+    "Russian": "Совет директоров собрался во вторник, чтобы обсудить квартальные результаты.",
+    "Ukrainian": "Рада директорів зібралася у вівторок, щоб обговорити квартальні результати.",
+    "Greek": "Το διοικητικό συμβούλιο συνεδρίασε την Τρίτη για να εξετάσει τα τριμηνιαία αποτελέσματα.",
+    "Arabic": "اجتمع مجلس الإدارة يوم الثلاثاء لمراجعة النتائج الفصلية.",
+    "Hebrew": "הדירקטוריון התכנס ביום שלישי כדי לבחון את התוצאות הרבעוניות.",
+    "Hindi": "निदेशक मंडल ने तिमाही नतीजों की समीक्षा के लिए मंगलवार को बैठक की।",
+    "Thai": "คณะกรรมการประชุมเมื่อวันอังคารเพื่อทบทวนผลประกอบการรายไตรมาส",
+    "Japanese": "取締役会は火曜日に四半期の業績を検討するために会合を開きました。",
+    "Chinese": "董事会周二开会审查了季度业绩，并决定推迟产品发布。",
+    "Korean": "이사회는 화요일에 분기 실적을 검토하기 위해 회의를 열었습니다.",
+}
+
+
+# A few sentences in each of some languages without a profile, which should be rejected
+_UNSUPPORTED_SAMPLES = {
+    "Albanian": (
+        "Mirë, le të fillojmë, sepse sot kemi shumë për të diskutuar dhe vetëm një orë. "
+        "Mendoj se problemi kryesor është se askush nuk e di me të vërtetë kush është përgjegjës për vendimin përfundimtar. "
+        "Çmimet e frutave dhe perimeve të freskëta janë rritur ndjeshëm që nga fillimi i verës. "
+        "Fëmijët u kthyen në shkollë të hënën pas gati dy muajsh pushime. "
+        "Faleminderit të gjithëve që erdhët, dhe mos harroni të plotësoni pyetësorin e shkurtër para se të largoheni."
+    ),
+    "Basque": (
+        "Ondo da, has gaitezen, gaur gauza asko ditugulako aztertzeko eta ordubete besterik ez. "
+        "Nire ustez arazo nagusia da inork ez dakiela benetan nor den azken erabakiaren arduraduna. "
+        "Fruta eta barazki freskoen prezioak asko igo dira udaren hasieratik. "
+        "Umeak astelehenean itzuli ziren eskolara ia bi hilabeteko oporren ondoren. "
+        "Eskerrik asko guztioi etortzeagatik, eta ez ahaztu inkesta laburra betetzea joan aurretik."
+    ),
+    "Estonian": (
+        "Hästi, alustame, sest meil on täna palju arutada ja ainult üks tund aega. "
+        "Ma arvan, et peamine probleem on see, et keegi ei tea täpselt, kes vastutab lõpliku otsuse eest. "
+        "Värskete puu- ja köögiviljade hinnad on suve algusest saadik järsult tõusnud. "
+        "Lapsed läksid esmaspäeval pärast peaaegu kahekuist puhkust kooli tagasi. "
+        "Aitäh kõigile, et tulite, ja ärge unustage enne lahkumist lühikest küsimustikku täita."
+    ),
+    "Hungarian": (
+        "Rendben, kezdjük, mert ma sok mindent kell megbeszélnünk, és csak egy óránk van. "
+        "Szerintem a fő probléma az, hogy senki sem tudja igazán, ki felel a végső döntésért. "
+        "A friss gyümölcs és zöldség ára a nyár eleje óta jelentősen emelkedett. "
+        "A gyerekek hétfőn visszamentek az iskolába közel két hónap szünet után. "
+        "Köszönöm mindenkinek, hogy eljött, és kérem, ne felejtsék el kitölteni a rövid kérdőívet távozás előtt."
+    ),
+    "Icelandic": (
+        "Jæja, byrjum, því við höfum margt að fara yfir í dag og aðeins eina klukkustund. "
+        "Ég held að stærsta vandamálið sé að enginn veit í raun hver ber ábyrgð á lokaákvörðuninni. "
+        "Verð á ferskum ávöxtum og grænmeti hefur hækkað mikið síðan í byrjun sumars. "
+        "Börnin fóru aftur í skólann á mánudaginn eftir næstum tveggja mánaða frí. "
+        "Takk öll fyrir að koma, og munið að fylla út stuttu könnunina áður en þið farið."
+    ),
+    "Latvian": (
+        "Labi, sāksim, jo šodien mums ir daudz ko pārrunāt un tikai viena stunda. "
+        "Es domāju, ka galvenā problēma ir tā, ka neviens īsti nezina, kurš ir atbildīgs par galīgo lēmumu. "
+        "Svaigu augļu un dārzeņu cenas kopš vasaras sākuma ir strauji augušas. "
+        "Bērni pirmdien pēc gandrīz divu mēnešu brīvlaika atgriezās skolā. "
+        "Paldies visiem, ka atnācāt, un neaizmirstiet pirms došanās prom aizpildīt īso aptauju."
+    ),
+    "Lithuanian": (
+        "Gerai, pradėkime, nes šiandien turime daug ką aptarti ir tik vieną valandą. "
+        "Manau, kad pagrindinė problema yra ta, jog niekas iš tikrųjų nežino, kas atsakingas už galutinį sprendimą. "
+        "Šviežių vaisių ir daržovių kainos nuo vasaros pradžios smarkiai išaugo. "
+        "Vaikai pirmadienį grįžo į mokyklą po beveik dviejų mėnesių atostogų. "
+        "Ačiū visiems, kad atvykote, ir nepamirškite prieš išeidami užpildyti trumpos apklausos."
+    ),
+    "Swahili": (
+        "Sawa, tuanze, kwa sababu leo tuna mambo mengi ya kujadili na saa moja tu. "
+        "Nadhani tatizo kubwa ni kwamba hakuna anayejua hasa nani anahusika na uamuzi wa mwisho. "
+        "Bei za matunda na mboga mpya zimepanda sana tangu mwanzo wa kiangazi. "
+        "Watoto walirudi shuleni Jumatatu baada ya likizo ya karibu miezi miwili. "
+        "Asanteni nyote kwa kuja, na msisahau kujaza dodoso fupi kabla ya kuondoka."
+    ),
+    "Tagalog": (
+        "Sige, simulan na natin, dahil marami tayong pag-uusapan ngayon at isang oras lang ang mayroon tayo. "
+        "Sa palagay ko, ang pangunahing problema ay walang nakakaalam kung sino talaga ang responsable sa huling desisyon. "
+        "Tumaas nang husto ang presyo ng sariwang prutas at gulay mula nang magsimula ang tag-init. "
+        "Bumalik sa paaralan ang mga bata noong Lunes matapos ang halos dalawang buwang bakasyon. "
+        "Nakatuklas ang mga siyentipiko ng bagong uri ng palaka sa mga bundok sa hilagang bahagi ng bansa."
+    ),
+    "Vietnamese": (
+        "Được rồi, chúng ta bắt đầu nhé, vì hôm nay có nhiều việc cần bàn mà chỉ có một tiếng. "
+        "Tôi nghĩ vấn đề chính là không ai thực sự biết ai chịu trách nhiệm về quyết định cuối cùng. "
+        "Giá trái cây và rau tươi đã tăng mạnh kể từ đầu mùa hè. "
+        "Bọn trẻ đã đi học lại vào thứ Hai sau gần hai tháng nghỉ hè. "
+        "Cảm ơn mọi người đã đến, và đừng quên điền vào bản khảo sát ngắn trước khi về."
+    ),
+    "Welsh": (
+        "Iawn, gadewch i ni ddechrau, achos mae gennym lawer i'w drafod heddiw a dim ond awr. "
+        "Rwy'n credu mai'r brif broblem yw nad oes neb yn gwybod yn iawn pwy sy'n gyfrifol am y penderfyniad terfynol. "
+        "Mae prisiau ffrwythau a llysiau ffres wedi codi'n sylweddol ers dechrau'r haf. "
+        "Aeth y plant yn ôl i'r ysgol ddydd Llun ar ôl bron i ddau fis o wyliau. "
+        "Diolch i chi i gyd am ddod, a pheidiwch ag anghofio llenwi'r arolwg byr cyn gadael."
+    ),
+}
+
+
+def _language_test_snippets(sentences, lengths, per_length, rng):
+    """Random word-aligned snippets of about each length from ``sentences`` joined together."""
+    text = " ".join(sentences)
+    starts = [0] + [match.end() for match in re.finditer(r"\s+", text)]
+    snippets = []
+    for length in lengths:
+        candidates = [start for start in starts if start + length <= len(text)] or [0]
+        for _ in range(per_length):
+            start = rng.choice(candidates)
+            end = text.rfind(" ", start, start + length + 1)
+            snippets.append((length, text[start:end if end > start else start + length]))
+    return snippets
+
+
+def bench_language_detection(lengths=(20, 50, 100, 200, 400), folds=4, per_length=25,
+                             min_confidence=None, seed=0):
+    """Cross-validated accuracy and speed of the local language detector.
+
+    The bundled samples are split into ``folds``; profiles are built without
+    each fold and tested on random snippets of the held-out sentences, so
+    no test text was seen in training. Snippets in languages without a
+    profile check that they are rejected rather than named as the closest one.
+    """
+    import json
+    import random
+    from collections import Counter
+    from language_detection import (
+        SAMPLES_PATH,
+        LanguageDetector,
+        build_profiles,
+        get_language_detector,
+    )
+
+    if min_confidence is None:
+        from config import LANGUAGE_DETECTION_MIN_CONFIDENCE as min_confidence
+
+    with open(SAMPLES_PATH, encoding="utf-8") as f:
+        samples = json.load(f)
+    rng = random.Random(seed)
+
+    # total, correct, rejected as unsupported, confident, confident correct
+    results = {length: [0, 0, 0, 0, 0] for length in lengths}
+    confusions = Counter()
+    for fold in range(folds):
+        training = {
+            language: [s for index, s in enumerate(sentences) if index % folds != fold]
+            for language, sentences in samples.items()
+        }
+        detector = LanguageDetector(build_profiles(training))
+        for language, sentences in samples.items():
+            held_out = [s for index, s in enumerate(sentences) if index % folds == fold]
+            for length, snippet in _language_test_snippets(held_out, lengths, per_length, rng):
+                detected, confidence = detector.detect(snippet)
+                row = results[length]
+                row[0] += 1
+                row[1] += detected == language
+                row[2] += detected is None
+                if confidence >= min_confidence:
+                    row[3] += 1
+                    row[4] += detected == language
+                    if detected != language:
+                        confusions[(language, detected)] += 1
+
+    print(f"{len(samples)} Latin-script languages, {folds}-fold cross-validation, "
+          f"Groq fallback below {min_confidence:.2f} confidence")
+    print(f"{'chars':>6} {'snippets':>9} {'accuracy':>9} {'rejected':>9} {'local':>7} {'local accuracy':>15}")
+    for length, (total, correct, rejected, confident, confident_correct) in results.items():
+        local_accuracy = confident_correct / confident if confident else float("nan")
+        print(f"{length:>6} {total:>9} {correct / total:>9.1%} {rejected / total:>9.1%} "
+              f"{confident / total:>7.1%} {local_accuracy:>15.1%}")
+    for (language, detected), count in confusions.most_common(5):
+        print(f"  confident mistake: {language} -> {detected} ({count})")
+
+    # Languages without a profile must go to Groq, not come back as their closest profile
+    detector = get_language_detector()
+    unsupported = {length: [0, 0, 0] for length in lengths}  # total, rejected, confident mistakes
+    confusions = Counter()
+    for language, text in _UNSUPPORTED_SAMPLES.items():
+        for length, snippet in _language_test_snippets([text], lengths, per_length, rng):
+            detected, confidence = detector.detect(snippet)
+            row = unsupported[length]
+            row[0] += 1
+            row[1] += detected is None
+            if detected is not None and confidence >= min_confidence:
+                row[2] += 1
+                confusions[(language, detected)] += 1
+    print(f"{len(_UNSUPPORTED_SAMPLES)} languages without a profile")
+    print(f"{'chars':>6} {'snippets':>9} {'rejected':>9} {'confident mistakes':>19}")
+    for length, (total, rejected, mistakes) in unsupported.items():
+        print(f"{length:>6} {total:>9} {rejected / total:>9.1%} {mistakes / total:>19.1%}")
+    for (language, detected), count in confusions.most_common(5):
+        print(f"  confident mistake: {language} -> {detected} ({count})")
+
+    script_correct = sum(detector.detect(text)[0] == language for language, text in _SCRIPT_SAMPLES.items())
+    print(f"Script-identified languages: {script_correct}/{len(_SCRIPT_SAMPLES)} correct")
+
+    # detect_language passes the first 1000 characters of the transcript
+    texts = [" ".join(sentences)[:1000] for sentences in samples.values()]
+    repeats = 200
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for text in texts:
+            detector.detect(text)
+    per_call = (time.perf_counter() - start) / (repeats * len(texts))
+    print(f"Detection time: {per_call * 1e6:.0f} us per text (vs. a Groq round trip of several hundred ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parallel = subparsers.add_parser("parallel", help="Multi-process transcription scaling")
+    parallel.add_argument("--minutes", type=float, default=30)
+    parallel.add_argument("--model", default="tiny")
+    parallel.add_argument("--workers", type=int, nargs="*")
+    parallel.add_argument("--batch-size", type=int, default=4)
+
+    quantization = subparsers.add_parser("quantization", help="int8 vs fp32 accuracy and speed")
+    quantization.add_argument("--sizes", nargs="*", default=["tiny", "base", "small"])
+    quantization.add_argument("--clip", help="Audio clip to transcribe (defaults to LibriSpeech samples)")
+    quantization.add_argument("--reference", help="Reference transcript for --clip")
+
+    importtime = subparsers.add_parser("importtime", help="Cold-start import time against a budget")
+    importtime.add_argument("--budget-ms", type=float, default=1500)
+    importtime.add_argument("--module", default="main")
+
+    video = subparsers.add_parser("video", help="MoviePy vs ffmpeg-pipe audio extraction")
+    video.add_argument("--size-mb", type=float, default=1024)
+
+    pdf = subparsers.add_parser("pdf", help="Serial vs page-parallel PDF text extraction")
+    pdf.add_argument("--pages", type=int, default=500)
+    pdf.add_argument("--workers", type=int, nargs="*")
+
+    docx = subparsers.add_parser("docx", help="python-docx vs streaming DOCX extraction")
+    docx.add_argument("--pages", type=int, default=300)
+
+    txt = subparsers.add_parser("txt", help="Peak memory of TXT ingestion")
+    txt.add_argument("--size-mb", type=float, default=200)
+
+    llm = subparsers.add_parser("llm", help="Sequential, concurrent and streamed LLM calls against a fake client")
+    llm.add_argument("--latency", type=float, default=1.5)
+    llm.add_argument("--news-latency", type=float, default=0.5)
+
+    langid = subparsers.add_parser("langid", help="Accuracy and speed of local language detection")
+    langid.add_argument("--folds", type=int, default=4)
+    langid.add_argument("--min-confidence", type=float)
+
+    args = parser.parse_args()
+    if args.benchmark == "parallel":
+        bench_parallel_transcription(args.minutes, args.model, args.workers, args.batch_size)
+    elif args.benchmark == "quantization":
+        if args.clip and not args.reference:
+            parser.error("--clip requires --reference")
+        bench_quantization(args.sizes, args.clip, args.reference)
+    elif args.benchmark == "importtime":
+        sys.exit(bench_import_time(args.budget_ms, args.module))
+    elif args.benchmark == "video":
+        bench_video_extraction(args.size_mb)
+    elif args.benchmark == "pdf":
+        bench_pdf_extraction(args.pages, args.workers)
+    elif args.benchmark == "docx":
+        bench_docx_extraction(args.pages)
+    elif args.benchmark == "txt":
+        bench_txt_ingestion(args.size_mb)
+    elif args.benchmark == "llm":
+        bench_llm_pipeline(args.latency, args.news_latency)
+    elif args.benchmark == "langid":
+        bench_language_detection(folds=args.folds, min_confidence=args.min_confidence)
+
+
+if __name__ == "__main__":
+    main()
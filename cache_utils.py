@@ -0,0 +1,379 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def hash_uploaded_file(uploaded_file):
+    """SHA-256 of an uploaded file's bytes, without copying the buffer."""
+    digest = hashlib.sha256()
+    with uploaded_file.getbuffer() as buffer:
+        digest.update(buffer)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Size-bounded JSON cache on disk, safe to share between sessions and processes.
+
+    Entries are written to a temporary file in the cache directory and moved
+    into place with ``os.replace``, so readers never see a partial entry. Reads
+    refresh the entry's modification time, and once the directory grows past
+    ``max_bytes`` the least recently used entries are deleted.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as entry:
+                value = json.load(entry)
+            os.utime(path)  # Mark as recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Missing, evicted by another session, or unreadable: treat as a miss
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return value
+
+    def set(self, key, value):
+        """Atomically store ``value`` (JSON-serializable) under ``key``."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as entry:
+                json.dump(value, entry)
+                entry.flush()
+                os.fsync(entry.fileno())
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self.stats["writes"] += 1
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits its budget."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    info = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, item.path))
+                total += info.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                with self._lock:
+                    self.stats["evictions"] += 1
+            except FileNotFoundError:
+                pass  # Already evicted by another session
+            total -= size
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class TieredCache:
+    """Bounded in-memory LRU in front of an optional ``DiskCache``.
+
+    Memory hits cost a dict lookup. On a memory miss the disk tier is tried
+    and a hit there is promoted back into memory. ``set`` writes through to
+    both tiers. The memory tier is bounded by the sizes passed to ``set``.
+    """
+
+    def __init__(self, max_bytes, disk=None):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self._entries = OrderedDict()  # key -> (value, size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._entries[key][0]
+
+        value = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["disk_hits"] += 1
+        self._remember(key, value, len(json.dumps(value)))
+        return value
+
+    def set(self, key, value, size):
+        """Store ``value`` (JSON-serializable, about ``size`` bytes) in both tiers."""
+        self._remember(key, value, size)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def _remember(self, key, value, size):
+        if size > self.max_bytes:
+            return  # Would evict everything else; leave it to the disk tier
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.stats["evictions"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._entries)
+            stats["memory_mb"] = self._bytes / (1024 * 1024)
+        stats["max_mb"] = self.max_bytes / (1024 * 1024)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["disk_enabled"] = self.disk is not None
+        return stats
+
+
+class LLMResponseCache:
+    """SQLite-backed cache of model replies with a TTL, a size budget and single-flight.
+
+    The database can be shared by every process on the machine (WAL mode, one
+    connection per thread). Entries older than ``ttl_seconds`` are treated as
+    misses and purged, and once the stored replies exceed ``max_bytes`` the
+    least recently used ones are deleted. Within a process, concurrent
+    requests for the same key share one upstream call.
+    """
+
+    def __init__(self, path, ttl_seconds, max_bytes):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> [Event, reply, exception]
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._connection().execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def get(self, key):
+        """Return the cached reply for ``key`` or None if missing or expired."""
+        connection = self._connection()
+        row = connection.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is not None and now - row[1] > self.ttl_seconds:
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._count("expired")
+            row = None
+        if row is None:
+            self._count("misses")
+            return None
+        connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now, now),
+        )
+        self._evict(connection, now)
+
+    def _evict(self, connection, now):
+        """Purge expired replies, then the least recently used ones until under budget."""
+        expired = connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            victims = []
+            for key, size in connection.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                if total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                total -= size
+            connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+            evicted = len(victims)
+        with self._lock:
+            self.stats["expired"] += max(expired, 0)
+            self.stats["evictions"] += evicted
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """Return the cached reply for ``key``, calling ``compute()`` once on a miss.
+
+        Empty or whitespace-only replies, and replies ``cacheable(value)``
+        rejects (e.g. cut off at ``max_tokens``), are passed through but not
+        cached.
+        Concurrent callers with the same key wait for the in-flight call and
+        share its reply (or its exception) instead of calling upstream again.
+        """
+        with self._lock:
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = [threading.Event(), None, None]
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            inflight[0].wait()
+            if inflight[2] is not None:
+                raise inflight[2]
+            return inflight[1]
+
+        try:
+            value = self.get(key)
+            if not value:
+                value = compute()
+                # An empty or truncated reply is a failure, not an answer;
+                # caching it would serve the failure for the whole TTL
+                if value and value.strip() and (cacheable is None or cacheable(value)):
+                    self.set(key, value)
+            inflight[1] = value
+            return value
+        except BaseException as e:
+            inflight[2] = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight[0].set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        stats["entries"] = entries
+        stats["size_mb"] = size / (1024 * 1024)
+        stats["max_mb"] = self.max_bytes / (1024 * 1024)
+        return stats
+
+
+_transcript_cache = None
+_transcript_cache_lock = threading.Lock()
+
+
+def get_transcript_cache():
+    """Return the transcript cache shared by all sessions in this process."""
+    global _transcript_cache
+    with _transcript_cache_lock:
+        if _transcript_cache is None:
+            from config import TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB
+            _transcript_cache = DiskCache(TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024)
+        return _transcript_cache
+
+
+def transcript_cache_key(content_hash, whisper_model_size, quantized=False):
+    """Cache key for a transcript of the given audio bytes and Whisper settings."""
+    from processing import PREPROCESSING_VERSION
+
+    precision = "int8" if quantized else "fp32"
+    return hashlib.sha256(
+        f"{content_hash}:{whisper_model_size}:{precision}:{PREPROCESSING_VERSION}".encode()
+    ).hexdigest()
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache():
+    """Return the extracted-text cache shared by all sessions in this process."""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            from config import EXTRACTION_CACHE_MAX_MB, EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_DISK_MAX_MB
+            disk = None
+            if EXTRACTION_CACHE_DIR:
+                disk = DiskCache(EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_DISK_MAX_MB * 1024 * 1024)
+            _extraction_cache = TieredCache(EXTRACTION_CACHE_MAX_MB * 1024 * 1024, disk)
+        return _extraction_cache
+
+
+def extraction_cache_key(content_hash, file_type, chunk_chars=None):
+    """Cache key for the text extracted from the given document bytes."""
+    from document_extraction import EXTRACTION_VERSION
+
+    return hashlib.sha256(
+        f"{content_hash}:{file_type}:{chunk_chars}:{EXTRACTION_VERSION}".encode()
+    ).hexdigest()
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the LLM response cache shared by all sessions, or None if disabled."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            from config import LLM_CACHE_PATH, LLM_CACHE_TTL_HOURS, LLM_CACHE_MAX_MB
+            if LLM_CACHE_TTL_HOURS <= 0:
+                return None
+            _llm_cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_TTL_HOURS * 3600, LLM_CACHE_MAX_MB * 1024 * 1024)
+        return _llm_cache
+
+
+def llm_cache_key(model, prompt, temperature, max_tokens=None, json_mode=False):
+    """Cache key for one chat completion request."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    return hashlib.sha256(
+        json.dumps([model, prompt_hash, temperature, max_tokens, json_mode]).encode()
+    ).hexdigest()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -18,6 +19,62 @@ MONAD_RPC_URL = os.environ.get("MONAD_RPC_URL", "https://testnet-rpc.monad.xyz/"
 MONAD_CHAIN_ID = os.environ.get("MONAD_CHAIN_ID", "10143")
 MONAD_EXPLORER_URL = os.environ.get("MONAD_EXPLORER_URL", "https://testnet.monadexplorer.com/")
 
+# Whisper model cache configuration (RAM budget shared by all sessions in the process)
+WHISPER_CACHE_MAX_MB = int(os.environ.get("WHISPER_CACHE_MAX_MB", "4096"))
+
+# Whisper sizes to preload in the background at server start, e.g. "base,small" (empty disables warm-up)
+WHISPER_WARMUP_SIZES = [size.strip() for size in os.environ.get("WHISPER_WARMUP_SIZES", "").split(",") if size.strip()]
+
+# Audio uploads up to this long are decoded in memory; longer ones are spooled to disk and streamed
+AUDIO_IN_MEMORY_MAX_SECONDS = float(os.environ.get("AUDIO_IN_MEMORY_MAX_SECONDS", "600"))
+
+# Disk cache for transcripts, shared by all sessions on this machine
+TRANSCRIPT_CACHE_DIR = os.environ.get(
+    "TRANSCRIPT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "poke_summarizer_cache", "transcripts")
+)
+TRANSCRIPT_CACHE_MAX_MB = int(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", "512"))
+
+# Cache of text extracted from documents: in-memory LRU, plus an on-disk tier if a directory is set
+EXTRACTION_CACHE_MAX_MB = int(os.environ.get("EXTRACTION_CACHE_MAX_MB", "256"))
+EXTRACTION_CACHE_DIR = os.environ.get("EXTRACTION_CACHE_DIR", "")
+EXTRACTION_CACHE_DISK_MAX_MB = int(os.environ.get("EXTRACTION_CACHE_DISK_MAX_MB", "1024"))
+
+# Groq chat model and its context window in tokens
+GROQ_MODEL = os.environ.get("GROQ_MODEL", "llama3-70b-8192")
+GROQ_CONTEXT_TOKENS = int(os.environ.get("GROQ_CONTEXT_TOKENS", "8192"))
+
+# Groq rate limits shared by all sessions in the process (defaults match the free tier for llama3-70b)
+GROQ_REQUESTS_PER_MINUTE = int(os.environ.get("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.environ.get("GROQ_TOKENS_PER_MINUTE", "6000"))
+
+# Groq HTTP connection pool shared by all sessions, and per-call timeouts in seconds
+GROQ_MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", "16"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("GROQ_MAX_KEEPALIVE_CONNECTIONS", "8"))
+GROQ_KEEPALIVE_EXPIRY = float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_CONNECT_TIMEOUT = float(os.environ.get("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_READ_TIMEOUT = float(os.environ.get("GROQ_READ_TIMEOUT", "60"))  # Between bytes, so streams can run longer
+GROQ_HEALTH_TTL_SECONDS = int(os.environ.get("GROQ_HEALTH_TTL_SECONDS", "60"))
+
+# Cache of Groq replies shared by all sessions on this machine (a TTL of 0 disables it)
+LLM_CACHE_PATH = os.environ.get(
+    "LLM_CACHE_PATH", os.path.join(tempfile.gettempdir(), "poke_summarizer_cache", "llm_responses.sqlite3")
+)
+LLM_CACHE_TTL_HOURS = float(os.environ.get("LLM_CACHE_TTL_HOURS", "24"))
+LLM_CACHE_MAX_MB = int(os.environ.get("LLM_CACHE_MAX_MB", "64"))
+
+# Long texts are summarized map-reduce style: chunked, summarized in parallel, then merged
+SUMMARY_CHUNK_CHARS = int(os.environ.get("SUMMARY_CHUNK_CHARS", "12000"))  # Characters per chunk
+SUMMARY_OUTPUT_TOKENS = int(os.environ.get("SUMMARY_OUTPUT_TOKENS", "1024"))  # Reserved for each reply
+SUMMARY_MAP_CONCURRENCY = int(os.environ.get("SUMMARY_MAP_CONCURRENCY", "4"))
+
+# Long raw transcripts are cleaned up in overlapping chunks, concurrently, then stitched back together
+TRANSCRIPT_CLEANUP_CHUNK_TOKENS = int(os.environ.get("TRANSCRIPT_CLEANUP_CHUNK_TOKENS", "1500"))
+TRANSCRIPT_CLEANUP_OVERLAP_CHARS = int(os.environ.get("TRANSCRIPT_CLEANUP_OVERLAP_CHARS", "300"))
+TRANSCRIPT_CLEANUP_CONCURRENCY = int(os.environ.get("TRANSCRIPT_CLEANUP_CONCURRENCY", "4"))
+
+# Language detection runs locally; Groq is asked only when the local confidence is below this
+LANGUAGE_DETECTION_MIN_CONFIDENCE = float(os.environ.get("LANGUAGE_DETECTION_MIN_CONFIDENCE", "0.9"))
+
 # Language support dictionary
 LANGUAGES = {
     "English": "English",
@@ -408,22 +408,58 @@ def render_custom_footer():
     """
     st.markdown(footer_html, unsafe_allow_html=True)
 
-def render_summary_box(summary):
-    """Render a professional-looking summary box"""
-    st.markdown(f"""
+def _render_incrementally(to_html, content, placeholder=None, min_interval=0.05):
+    """Render ``content`` (a string, or an iterator of text deltas) and return the full text.
+
+    Deltas are accumulated and the HTML re-rendered in ``placeholder`` as they
+    arrive, at most every ``min_interval`` seconds, with a cursor until the
+    stream ends.
+    """
+    import time
+
+    target = placeholder if placeholder is not None else st
+    if isinstance(content, str):
+        target.markdown(to_html(content), unsafe_allow_html=True)
+        return content
+
+    if placeholder is None:
+        placeholder = st.empty()
+    parts = []
+    rendered_at = 0.0
+    for delta in content:
+        parts.append(delta)
+        now = time.monotonic()
+        if now - rendered_at >= min_interval:
+            placeholder.markdown(to_html("".join(parts) + " ▌"), unsafe_allow_html=True)
+            rendered_at = now
+    text = "".join(parts).strip()
+    placeholder.markdown(to_html(text), unsafe_allow_html=True)
+    return text
+
+def render_summary_box(summary, placeholder=None):
+    """Render a professional-looking summary box.
+
+    ``summary`` may be an iterator of text deltas, rendered as they stream in;
+    returns the summary text.
+    """
+    return _render_incrementally(lambda text: f"""
     <div class="summary-container">
-        {summary}
+        {text}
     </div>
-    """, unsafe_allow_html=True)
+    """, summary, placeholder)
 
-def render_sentiment_box(sentiment, sentiment_type="Standard"):
-    """Render a professional-looking sentiment analysis box"""
-    st.markdown(f"""
+def render_sentiment_box(sentiment, sentiment_type="Standard", placeholder=None):
+    """Render a professional-looking sentiment analysis box.
+
+    ``sentiment`` may be an iterator of text deltas, rendered as they stream
+    in; returns the sentiment text.
+    """
+    return _render_incrementally(lambda text: f"""
     <div class="sentiment-container">
         <strong>{sentiment_type} Sentiment Analysis</strong><br><br>
-        {sentiment}
+        {text}
     </div>
-    """, unsafe_allow_html=True)
+    """, sentiment, placeholder)
 
 def render_news_card(article):
     """Render a single news article in a professional card"""
@@ -0,0 +1,419 @@
+import codecs
+import hashlib
+import os
+import re
+import threading
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump whenever an extractor changes the text it produces, so cached extractions are not reused
+EXTRACTION_VERSION = 1
+
+# Below this many pages the pool's startup and IPC cost more than they save
+PARALLEL_MIN_PAGES = 32
+
+
+def _extract_page_range(pdf_path, first, last):
+    """Extract pages ``first``..``last - 1`` inside a worker process.
+
+    Each worker opens its own reader; PyPDF2 parses pages lazily, so only the
+    pages of this range are actually decoded. Returns (page index, text,
+    seconds) for every page.
+    """
+    from PyPDF2 import PdfReader
+
+    return list(_iter_page_texts(PdfReader(pdf_path), first, last))
+
+
+def _iter_page_texts(reader, first, last):
+    """Yield (page index, text, seconds) for pages ``first``..``last - 1`` of an open reader."""
+    for index in range(first, last):
+        start = time.perf_counter()
+        text = reader.pages[index].extract_text() or ""
+        yield index, text, time.perf_counter() - start
+
+
+def split_page_ranges(num_pages, num_ranges):
+    """Split ``num_pages`` pages into contiguous (first, last) ranges of similar size."""
+    num_ranges = max(1, min(num_ranges, num_pages))
+    size, remainder = divmod(num_pages, num_ranges)
+    ranges = []
+    first = 0
+    for index in range(num_ranges):
+        last = first + size + (1 if index < remainder else 0)
+        ranges.append((first, last))
+        first = last
+    return ranges
+
+
+_pools = None
+_pools_lock = threading.Lock()
+
+
+def extraction_pool(num_workers):
+    """Lease a process pool for page extraction (a context manager), kept alive between documents.
+
+    A pool is only shut down once no session is using it.
+    """
+    global _pools
+    from perf_utils import ProcessPoolRegistry
+
+    with _pools_lock:
+        if _pools is None:
+            _pools = ProcessPoolRegistry(max_idle=1)
+    return _pools.lease(num_workers, lambda: ProcessPoolExecutor(
+        max_workers=num_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    ))
+
+
+def iter_pdf_pages(pdf_path, num_workers=None, min_parallel_pages=PARALLEL_MIN_PAGES,
+                   progress_callback=None):
+    """Yield (page index, text, seconds) for every page of a PDF on disk, in page order.
+
+    Page ranges are sharded across a process pool and yielded as soon as each
+    range and all the ones before it have finished. Documents shorter than
+    ``min_parallel_pages``, or a single worker, are extracted serially in this
+    process. ``progress_callback(pages_done, num_pages)`` is called as ranges
+    finish.
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path)
+    num_pages = len(reader.pages)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    # The pool is sized by the request, not the document, so documents of any length share it
+    busy_workers = max(1, min(num_workers, num_pages))
+
+    if busy_workers == 1 or num_pages < min_parallel_pages:
+        ranges = [(0, num_pages)]
+        pool = None
+    else:
+        # A few ranges per worker so one slow, image-heavy range doesn't hold up the rest
+        ranges = split_page_ranges(num_pages, busy_workers * 4)
+        pool = extraction_pool(num_workers)
+
+    if pool is None:
+        # Serial: one reader for the whole document, yielding each page as it's ready
+        for page in _iter_page_texts(reader, 0, num_pages):
+            yield page
+            if progress_callback:
+                progress_callback(page[0] + 1, num_pages)
+        return
+
+    with pool as executor:
+        pending = [executor.submit(_extract_page_range, pdf_path, first, last) for first, last in ranges]
+        pages_done = 0
+        for future in pending:
+            results = future.result()
+            pages_done += len(results)
+            if progress_callback:
+                progress_callback(pages_done, num_pages)
+            yield from results
+
+
+def extract_pdf_text(pdf_path, num_workers=None, min_parallel_pages=PARALLEL_MIN_PAGES,
+                     progress_callback=None):
+    """Extract the text of a PDF on disk, sharding page ranges across processes.
+
+    Every page is extracted exactly once and the page texts are joined in page
+    order, skipping pages without text. Returns (text, stats), where stats holds
+    the page count, worker count, total seconds and the per-page extraction
+    times in ``page_seconds``.
+    """
+    start = time.perf_counter()
+    timings = []
+    texts = []
+    for index, text, seconds in iter_pdf_pages(pdf_path, num_workers, min_parallel_pages, progress_callback):
+        timings.append((index, seconds))
+        texts.append(text)
+    text = "".join(join_segments(texts))
+    return text, pdf_page_stats(timings, start, num_workers, min_parallel_pages)
+
+
+def pdf_page_stats(timings, start, num_workers=None, min_parallel_pages=PARALLEL_MIN_PAGES):
+    """Stats for the (page index, seconds) timings of a run that began at ``start``."""
+    num_pages = len(timings)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_pages < min_parallel_pages:
+        num_workers = 1
+    page_seconds = [0.0] * num_pages
+    for index, seconds in timings:
+        page_seconds[index] = seconds
+    return {
+        "pages": num_pages,
+        "workers": max(1, min(num_workers, num_pages)),
+        "seconds": time.perf_counter() - start,
+        "page_seconds": page_seconds,
+    }
+
+
+def slowest_pages(stats, count=5):
+    """The ``count`` slowest pages as (1-based page number, seconds), slowest first."""
+    ranked = sorted(enumerate(stats["page_seconds"], start=1), key=lambda item: item[1], reverse=True)
+    return ranked[:count]
+
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_CONTAINERS = (_W + "body", _W + "footnote", _W + "endnote")
+_DOCX_HEADER_FOOTER = re.compile(r"word/(header|footer)(\d*)\.xml$")
+
+
+def _iter_docx_part(xml_file):
+    """Stream-parse one WordprocessingML part, yielding paragraphs and table cells in order.
+
+    Each paragraph's text is built from its runs (text, tabs and breaks) when
+    the paragraph closes, then the element is cleared and detached, so memory
+    stays flat however long the part is. A table cell is emitted once, as the
+    newline-joined text of its paragraphs; nested tables fold into their cell.
+    """
+    from xml.etree.ElementTree import iterparse
+
+    stack = []
+    cells = []  # Paragraph texts of each open table cell, innermost last
+    for event, elem in iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == _W + "tc":
+                cells.append([])
+            continue
+
+        stack.pop()
+        text = None
+        if elem.tag == _W + "p":
+            parts = []
+            for node in elem.iter():
+                if node.tag == _W + "t" and node.text:
+                    parts.append(node.text)
+                elif node.tag == _W + "tab":
+                    parts.append("\t")
+                elif node.tag in (_W + "br", _W + "cr"):
+                    parts.append("\n")
+            text = "".join(parts)
+        elif elem.tag == _W + "tc":
+            text = "\n".join(part for part in cells.pop() if part)
+
+        if text is not None:
+            elem.clear()  # Also drops nested text boxes, so their text isn't repeated
+            if cells:
+                cells[-1].append(text)
+            elif text:
+                yield text
+
+        # Detach finished top-level blocks (body children, header paragraphs, footnotes)
+        if len(stack) == 1 or (len(stack) == 2 and stack[-1].tag in _DOCX_CONTAINERS):
+            stack[-1].remove(elem)
+
+
+def iter_docx_text(docx_file):
+    """Yield the text of a DOCX file as paragraphs and table cells, in document order.
+
+    The zip is read directly and each XML part is stream-parsed instead of
+    building python-docx's object tree. The body comes first, then footnotes
+    and endnotes, then headers and footers; header and footer lines repeated
+    across sections are only emitted once.
+    """
+    import zipfile
+
+    with zipfile.ZipFile(docx_file) as archive:
+        names = set(archive.namelist())
+        with archive.open("word/document.xml") as part:
+            yield from _iter_docx_part(part)
+
+        for name in ("word/footnotes.xml", "word/endnotes.xml"):
+            if name in names:
+                with archive.open(name) as part:
+                    yield from _iter_docx_part(part)
+
+        header_footers = []
+        for name in names:
+            match = _DOCX_HEADER_FOOTER.match(name)
+            if match:
+                header_footers.append((match.group(1) == "footer", int(match.group(2) or 0), name))
+        seen = set()
+        for _, _, name in sorted(header_footers):
+            with archive.open(name) as part:
+                for text in _iter_docx_part(part):
+                    if text not in seen:
+                        seen.add(text)
+                        yield text
+
+
+# Byte order marks, longest first (the UTF-32-LE mark starts with the UTF-16-LE one)
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+# charset_normalizer's language coherence below which its guess loses to a
+# strict cp1252 decode; its wrong guesses for accent-heavy Western text score
+# well under this, real Cyrillic, Greek, Hebrew or Arabic text well over it
+_MIN_COHERENCE = 0.35
+
+
+def _reads_as_western(text):
+    """Whether ``text`` looks like a Western language rather than another 8-bit code page.
+
+    Accented letters are a small share of the letters in Western European
+    text; Cyrillic or Greek bytes read as cp1252 come out as words made
+    almost entirely of them.
+    """
+    letters = [char for char in text if char.isalpha()]
+    accented = sum(1 for char in letters if char > "\x7f")
+    return accented <= 0.3 * len(letters)
+
+
+def sniff_text_encoding(sample):
+    """Guess the encoding of a text file from a sample of its first bytes.
+
+    A byte order mark wins, then UTF-8 if the sample decodes as UTF-8, then
+    cp1252, which covers most Windows transcript exports, if it decodes
+    strictly and reads like Western text. charset_normalizer's guess is only
+    trusted after that, and only if it is confident or cp1252 can't decode the
+    sample: on Western text dense with accents it picks code pages such as
+    big5 or cp1250 that turn "São João" into nonsense.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # Not final, so a character cut off at the end of the sample is fine
+        codecs.getincrementaldecoder("utf-8")().decode(sample)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        decodes_as_cp1252 = True
+        if _reads_as_western(sample.decode("cp1252")):
+            return "cp1252"
+    except UnicodeDecodeError:
+        decodes_as_cp1252 = False  # Bytes cp1252 leaves undefined
+    try:
+        from charset_normalizer import from_bytes
+        best = from_bytes(sample).best()
+        if best is not None and (best.coherence >= _MIN_COHERENCE or not decodes_as_cp1252):
+            return best.encoding
+    except ImportError:
+        pass
+    return "cp1252"
+
+
+def decode_text_buffer(buffer, encoding=None, sample_size=64 * 1024):
+    """Decode a bytes-like buffer (memoryview, mmap) to text, sniffing the encoding.
+
+    The buffer is decoded in place, so the only copy made is the resulting
+    string. Undecodable bytes become U+FFFD instead of failing the upload.
+    Returns (text, encoding).
+    """
+    if encoding is None:
+        encoding = sniff_text_encoding(bytes(buffer[:sample_size]))
+    return codecs.decode(buffer, encoding, errors="replace"), encoding
+
+
+def join_segments(segments, separator="\n"):
+    """Yield pieces that concatenate to ``separator.join`` of the non-empty segments."""
+    first = True
+    for segment in segments:
+        if not segment:
+            continue
+        yield segment if first else separator + segment
+        first = False
+
+
+_STATS_SLICE_CHARS = 1024 * 1024
+
+
+class TextStats:
+    """Running statistics over text that is produced piece by piece.
+
+    ``update`` is fed the pieces in order; the SHA-256, character and word
+    counts then match what hashing, ``len`` and ``len(text.split())`` would give
+    for the concatenated text, without building it or splitting it into a word
+    list. With ``chunk_chars`` set, (start, end) character offsets of chunks of
+    at most that size are recorded, preferably at piece boundaries, ready for
+    chunked summarization.
+    """
+
+    def __init__(self, chunk_chars=None):
+        self.chunk_chars = chunk_chars
+        self._digest = hashlib.sha256()
+        self.chars = 0
+        self.words = 0
+        self.segments = 0
+        self.chunks = []
+        self._chunk_start = 0
+        self._ends_in_word = False
+
+    def update(self, segment):
+        if not segment:
+            return
+        if self.chunk_chars:
+            self._close_chunks(segment)
+        # Long pieces (a whole decoded TXT file) are hashed and counted in slices to keep temporaries small
+        for start in range(0, len(segment), _STATS_SLICE_CHARS):
+            self._count(segment[start:start + _STATS_SLICE_CHARS])
+        self.chars += len(segment)
+        self.segments += 1
+
+    def _count(self, piece):
+        self._digest.update(piece.encode("utf-8"))
+        words = len(piece.split())
+        if words and self._ends_in_word and not piece[0].isspace():
+            words -= 1  # A word split across two pieces was counted twice
+        self.words += words
+        self._ends_in_word = not piece[-1].isspace()
+
+    def _close_chunks(self, piece):
+        """Record every chunk that ends before the end of ``piece``.
+
+        A piece that fits in a chunk of its own starts a new chunk rather than
+        being split. Larger pieces are cut at the last newline, else the last
+        space, before the size limit.
+        """
+        start = 0  # First index of the piece not yet in a closed chunk
+        while self.chars + len(piece) - self._chunk_start > self.chunk_chars:
+            if self.chars + start > self._chunk_start and len(piece) - start <= self.chunk_chars:
+                cut = start
+            else:
+                limit = self._chunk_start + self.chunk_chars - self.chars
+                cut = piece.rfind("\n", start, limit) + 1
+                if cut <= start:
+                    cut = piece.rfind(" ", start, limit) + 1
+                if cut <= start:
+                    cut = start if self.chars + start > self._chunk_start else limit
+            self.chunks.append((self._chunk_start, self.chars + cut))
+            self._chunk_start = self.chars + cut
+            start = cut
+
+    def as_dict(self):
+        chunks = list(self.chunks)
+        if self.chunk_chars and self.chars > self._chunk_start:
+            chunks.append((self._chunk_start, self.chars))
+        return {
+            "sha256": self._digest.hexdigest(),
+            "chars": self.chars,
+            "words": self.words,
+            "segments": self.segments,
+            "chunks": chunks,
+        }
+
+
+def stream_with_stats(segments, stats):
+    """Pass ``segments`` through unchanged while feeding them to ``stats``."""
+    for segment in segments:
+        stats.update(segment)
+        yield segment
+
+
+def measure_text(text, chunk_chars=None):
+    """``TextStats`` of an already materialized string, e.g. a transcript."""
+    stats = TextStats(chunk_chars)
+    stats.update(text)
+    return stats.as_dict()
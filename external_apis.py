@@ -1,19 +1,52 @@
-import requests
 import streamlit as st
-import json
-from datetime import datetime
 import os
-from config import DEPLOYER_PRIVATE_KEY, MONAD_RPC_URL, MONAD_CHAIN_ID, MONAD_EXPLORER_URL
+import threading
+import time
+from config import (
+    DEPLOYER_PRIVATE_KEY,
+    MONAD_RPC_URL,
+    MONAD_CHAIN_ID,
+    MONAD_EXPLORER_URL,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE_CONNECTIONS,
+    GROQ_KEEPALIVE_EXPIRY,
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_READ_TIMEOUT,
+    GROQ_HEALTH_TTL_SECONDS,
+)
 
 # Groq Client (moved function here)
+@st.cache_resource(show_spinner=False)
 def get_groq_client():
+    """Create the Groq client once per process and share it across sessions.
+
+    Every Groq call goes through this client and its connection pool, so
+    sessions reuse warm keep-alive connections instead of opening new ones.
+    Each call gets connect and read timeouts. The SDK's own retries are
+    off: the rate-limit scheduler retries failed calls within the shared
+    request budget instead.
+    """
     try:
         import groq
+        import httpx
         api_key = os.environ.get("GROQ_API_KEY")
         if not api_key or api_key == "YOUR_GROQ_API_KEY":
             st.warning("Groq API key not configured. Some features will be unavailable.")
             return None
-        client = groq.Client(api_key=api_key)
+        timeout = httpx.Timeout(GROQ_READ_TIMEOUT, connect=GROQ_CONNECT_TIMEOUT)
+        limits = httpx.Limits(
+            max_connections=GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        )
+        # DefaultHttpxClient keeps the SDK's transport defaults; older SDKs take a plain httpx client
+        http_client_class = getattr(groq, "DefaultHttpxClient", httpx.Client)
+        client = groq.Client(
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=0,
+            http_client=http_client_class(timeout=timeout, limits=limits),
+        )
         return client
     except ImportError:
         st.error("Groq library not found. Please install it with 'pip install groq'.")
@@ -22,6 +55,46 @@ def get_groq_client():
         st.error(f"Error initializing Groq client: {e}")
         return None
 
+# Last Groq health probe, shared by all sessions; refreshed on a background thread
+_groq_health = {"ok": None, "latency_ms": None, "error": None, "checked_at": None}
+_groq_health_lock = threading.Lock()
+_groq_health_thread = None
+
+
+def _probe_groq_health(client):
+    start = time.perf_counter()
+    try:
+        client.with_options(timeout=GROQ_CONNECT_TIMEOUT * 2, max_retries=0).models.list()
+        result = {"ok": True, "latency_ms": (time.perf_counter() - start) * 1000, "error": None}
+    except Exception as e:
+        result = {"ok": False, "latency_ms": None, "error": str(e)}
+    with _groq_health_lock:
+        _groq_health.update(result, checked_at=time.time())
+
+
+def check_groq_health():
+    """Return the last Groq API probe without waiting for a new one.
+
+    A cheap model listing runs on a background thread when the last result is
+    older than ``GROQ_HEALTH_TTL_SECONDS``, at most one at a time for the
+    process, so a slow or unreachable API never holds up the page. Returns a
+    dict with ``ok`` (None until the first probe finishes), ``latency_ms``,
+    ``error`` (None when ok) and ``checked_at`` (a ``time.time()`` value).
+    """
+    global _groq_health_thread
+    client = get_groq_client()
+    if client is None:
+        return {"ok": False, "latency_ms": None, "error": "API client not initialized", "checked_at": None}
+    with _groq_health_lock:
+        checked_at = _groq_health["checked_at"]
+        stale = checked_at is None or time.time() - checked_at >= GROQ_HEALTH_TTL_SECONDS
+        if stale and (_groq_health_thread is None or not _groq_health_thread.is_alive()):
+            _groq_health_thread = threading.Thread(
+                target=_probe_groq_health, args=(client,), name="groq-health", daemon=True
+            )
+            _groq_health_thread.start()
+        return dict(_groq_health)
+
 # Monad Blockchain Client
 class MonadBlockchainClient:
     def __init__(self):
@@ -0,0 +1,223 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+PROFILES_PATH = os.path.join(_HERE, "language_profiles.json")
+SAMPLES_PATH = os.path.join(_HERE, "language_samples.json")
+
+# Trigrams kept per language. Rarer ones mostly reflect the sample's topics, not the language.
+PROFILE_SIZE = 1000
+
+# Only the start of the text is classified; a few hundred characters are plenty
+SAMPLE_CHARS = 400
+
+# Naive Bayes treats overlapping trigrams as independent, which makes raw
+# posteriors far too confident; scores are scaled down before the softmax
+SCORE_SCALE = 0.2  # Calibrated with benchmarks.py langid
+
+# Text in a language without a profile still has a closest profile, often with
+# high confidence. It is rejected when the share of its trigrams found in that
+# profile is more than this many standard errors below the share expected for
+# the language itself.
+COVERAGE_TOLERANCE = 3.0  # Calibrated with benchmarks.py langid
+
+_LETTERS = re.compile(r"[^\W\d_]+")
+_NON_LATIN = re.compile("[^\u0000-\u036f]")
+
+# Scripts used by a single language (or close enough to name one), as code point ranges
+_SCRIPTS = (
+    (0x0370, 0x03FF, "Greek"),
+    (0x0400, 0x04FF, "Cyrillic"),
+    (0x0590, 0x05FF, "Hebrew"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0900, 0x097F, "Hindi"),
+    (0x0E00, 0x0E7F, "Thai"),
+    (0x1100, 0x11FF, "Korean"),
+    (0x3040, 0x30FF, "Japanese"),  # Hiragana and Katakana
+    (0x4E00, 0x9FFF, "Chinese"),  # Han, also used in Japanese
+    (0xAC00, 0xD7AF, "Korean"),
+)
+
+
+def _padded_words(text):
+    return " " + " ".join(_LETTERS.findall(text.lower())) + " "
+
+
+def text_trigrams(text):
+    """Lowercase character trigrams of ``text``'s words, padded with spaces at word boundaries."""
+    padded = _padded_words(text)
+    return [padded[index:index + 3] for index in range(len(padded) - 2)]
+
+
+def _top_trigrams(texts, profile_size):
+    counts = Counter()
+    for text in texts:
+        counts.update(text_trigrams(text))
+    return counts, counts.most_common(profile_size)
+
+
+def _held_out_coverage(texts, profile_size, folds=4):
+    """Share of unseen text's trigrams that are in the profile, estimated by cross-validation."""
+    found = total = 0
+    for fold in range(folds):
+        training = [text for index, text in enumerate(texts) if index % folds != fold]
+        _, top = _top_trigrams(training, profile_size)
+        profiled = {gram for gram, _ in top}
+        for index in range(fold, len(texts), folds):
+            grams = text_trigrams(texts[index])
+            found += sum(gram in profiled for gram in grams)
+            total += len(grams)
+    return found / total if total else 0.0
+
+
+def build_profiles(samples, profile_size=PROFILE_SIZE):
+    """Build trigram profiles from ``{language: [sample text, ...]}``.
+
+    Each profile holds the log-probabilities (add-one smoothed) of the
+    language's ``profile_size`` most frequent trigrams, a floor for the
+    trigrams it doesn't list, and the share of a new text's trigrams it is
+    expected to list.
+    """
+    profiles = {}
+    for language, texts in samples.items():
+        counts, top = _top_trigrams(texts, profile_size)
+        total = sum(counts.values()) + profile_size
+        profiles[language] = {
+            "coverage": round(_held_out_coverage(texts, profile_size), 3),
+            "floor": round(math.log(1 / total), 3),
+            "trigrams": {
+                gram: round(math.log((count + 1) / total), 3)
+                for gram, count in top
+            },
+        }
+    return profiles
+
+
+def _script_language(sample):
+    """Name the language of text in a non-Latin script as (language, confidence), or None."""
+    if not _NON_LATIN.search(sample):
+        return None
+    scripts = Counter()
+    for char in sample:
+        if char >= "\u0370" and char.isalpha():  # Past Latin and its extensions
+            code = ord(char)
+            for start, end, script in _SCRIPTS:
+                if start <= code <= end:
+                    scripts[script] += 1
+                    break
+    if not scripts:
+        return None
+    script, count = scripts.most_common(1)[0]
+    if script == "Chinese" and scripts["Japanese"]:
+        script, count = "Japanese", count + scripts["Japanese"]
+    if count < sum(map(len, _LETTERS.findall(sample))) / 2:
+        return None  # Mostly Latin; names or quotes in another script
+
+    sample = sample.lower()
+    if script == "Cyrillic":
+        if any(char in sample for char in "іїєґ"):
+            return "Ukrainian", 0.95
+        if any(char in sample for char in "ђћџљњј"):
+            return "Serbian", 0.95
+        # Ы and э are Russian; Bulgarian, Macedonian and others need a closer look
+        return ("Russian", 0.95) if any(char in sample for char in "ыэ") else ("Russian", 0.5)
+    if script == "Arabic" and any(char in sample for char in "پچژگ"):
+        return "Persian", 0.6  # Also Urdu and others
+    return script, 0.95
+
+
+class LanguageDetector:
+    """Character trigram language classifier.
+
+    Scores each language by the naive Bayes log-likelihood of the text's
+    trigrams under its profile. Languages in non-Latin scripts are named from
+    the script directly. ``detect`` returns (language, confidence), where
+    confidence is the winning language's posterior probability, or
+    (None, 0.0) for text in a language without a profile.
+    """
+
+    def __init__(self, profiles):
+        import numpy as np
+
+        self.languages = sorted(profiles)
+        self._floors = np.array([profiles[language]["floor"] for language in self.languages])
+        self._coverage = np.array([profiles[language]["coverage"] for language in self.languages])
+        # One row per profiled trigram: its log-probability above the floor in each language
+        grams = sorted({gram for profile in profiles.values() for gram in profile["trigrams"]})
+        self._rows = {gram: row for row, gram in enumerate(grams)}
+        self._gains = np.zeros((len(grams) + 1, len(self.languages)))  # Last row: unprofiled trigrams
+        for column, language in enumerate(self.languages):
+            floor = self._floors[column]
+            for gram, log_probability in profiles[language]["trigrams"].items():
+                self._gains[self._rows[gram], column] = log_probability - floor
+        self._profiled = self._gains > 0
+
+    def _score(self, text):
+        """Trigram row counts of ``text`` and each language's posterior probability."""
+        import numpy as np
+
+        padded = _padded_words(text[:SAMPLE_CHARS])
+        lookup, unprofiled = self._rows.get, len(self._rows)
+        rows = [lookup(padded[index:index + 3], unprofiled) for index in range(len(padded) - 2)]
+        counts = np.bincount(rows, minlength=len(self._gains))
+        scores = self._floors * len(rows) + counts @ self._gains
+        weights = np.exp((scores - scores.max()) * SCORE_SCALE)
+        return counts, weights / weights.sum()
+
+    def probabilities(self, text):
+        """Posterior probability of each profiled language for ``text``, highest first."""
+        import numpy as np
+
+        _, weights = self._score(text)
+        order = np.argsort(-weights)
+        return [(self.languages[column], float(weights[column])) for column in order]
+
+    def detect(self, text):
+        """Return (language, confidence) for ``text``; (None, 0.0) if it has no letters or no profile fits."""
+        sample = text[:SAMPLE_CHARS]
+        scripted = _script_language(sample)
+        if scripted is not None:
+            return scripted
+        if not _LETTERS.search(sample):
+            return None, 0.0
+        counts, weights = self._score(sample)
+        column = int(weights.argmax())
+        # Trigrams are counted like independent draws, each listed in the
+        # profile with the language's expected coverage
+        total = counts.sum()
+        expected = self._coverage[column]
+        found = counts[self._profiled[:, column]].sum() / total
+        if found < expected - COVERAGE_TOLERANCE * math.sqrt(expected * (1 - expected) / total):
+            return None, 0.0
+        return self.languages[column], float(weights[column])
+
+
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_language_detector():
+    """Return the detector shared by the process, loading the profiles on first use."""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            with open(PROFILES_PATH, encoding="utf-8") as f:
+                _detector = LanguageDetector(json.load(f))
+        return _detector
+
+
+def write_profiles(samples_path=SAMPLES_PATH, profiles_path=PROFILES_PATH):
+    """Rebuild the bundled profiles from the sample texts."""
+    with open(samples_path, encoding="utf-8") as f:
+        samples = json.load(f)
+    with open(profiles_path, "w", encoding="utf-8") as f:
+        json.dump(build_profiles(samples), f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+
+
+if __name__ == "__main__":
+    write_profiles()
+    print(f"Wrote {PROFILES_PATH}")
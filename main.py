@@ -1,15 +1,23 @@
 import streamlit as st
 import os
-import hashlib
-from image_utils import get_placeholder_image
 from wallet_integration import BaseWalletSDK
 from base_integration import render_base_blockchain_info, render_payment_form
-from config import LANGUAGES, GROQ_API_KEY  # Import constants
+from config import LANGUAGES, GROQ_API_KEY, WHISPER_WARMUP_SIZES, SUMMARY_CHUNK_CHARS  # Import constants
 from user_auth import render_auth_ui, render_user_profile
 from datetime import datetime
-from external_apis import get_groq_client, MonadBlockchainClient
-from processing import extract_text_from_file, preprocess_audio
+from external_apis import get_groq_client, check_groq_health, MonadBlockchainClient
+from processing import (
+    extract_text_from_file,
+    extract_document_text,
+    load_audio_from_upload,
+    preprocess_audio,
+    remove_silence,
+)
+from document_extraction import measure_text, slowest_pages
 from pdf_utils import create_summary_pdf, get_pdf_download_link
+from model_registry import get_model_registry, start_warmup, get_warmup_status
+from rate_limiter import get_groq_scheduler
+from cache_utils import hash_uploaded_file, get_transcript_cache, transcript_cache_key, get_extraction_cache, get_llm_cache
 from news_api import get_news_client, fetch_related_news, fetch_latest_news
 from transcription_and_summarization import (
     transcribe_with_transformers_whisper,
@@ -17,8 +25,8 @@ from transcription_and_summarization import (
     translate_to_language,
     detect_language,
     improve_transcript_quality,
-    summarize_text_groq,
-    analyze_sentiment,
+    summarize_and_analyze,
+    stream_summary_and_analysis,
 )  # Import all functions
 
 # Import our custom styling
@@ -49,6 +57,18 @@ if 'summary_language' not in st.session_state:
 # Initialize session state for sentiment analysis approach
 if 'sentiment_analysis_approach' not in st.session_state:
     st.session_state.sentiment_analysis_approach = "standard"
+
+# Initialize session state for single-call summary + sentiment
+if 'combined_analysis' not in st.session_state:
+    st.session_state.combined_analysis = False
+
+# Initialize session state for int8 quantized Whisper inference
+if 'whisper_quantized' not in st.session_state:
+    st.session_state.whisper_quantized = False
+
+# Initialize session state for the number of CPU transcription workers
+if 'transcription_workers' not in st.session_state:
+    st.session_state.transcription_workers = 1
     
 # Initialize session state for authentication
 if 'user_authenticated' not in st.session_state:
@@ -57,6 +77,9 @@ if 'user_authenticated' not in st.session_state:
 if 'is_pro' not in st.session_state:
     st.session_state.is_pro = False
 
+# Preload Whisper models in the background (only the first run in the process starts it)
+start_warmup(WHISPER_WARMUP_SIZES)
+
 # Initialize clients
 client = get_groq_client()
 news_api_key = get_news_client()
@@ -155,6 +178,7 @@ def main():
                     st.code(wallet.get('address'), language="text")
                     st.markdown("Scan the QR code below:")
                     # Generate QR code placeholder
+                    from image_utils import get_placeholder_image
                     st.image(get_placeholder_image(150, 150), width=150)
                 
                 with wallet_tabs[3]:
@@ -189,6 +213,67 @@ def main():
                 ["tiny", "base", "small", "medium", "large"],
                 index=1  # Default to "base"
             )
+
+            st.session_state.whisper_quantized = st.checkbox(
+                "Quantized CPU inference (int8)",
+                value=st.session_state.whisper_quantized,
+                help="Faster, lower-memory Whisper on CPU with a small accuracy cost"
+            )
+
+            st.session_state.transcription_workers = st.slider(
+                "Transcription Workers",
+                min_value=1,
+                max_value=max(1, os.cpu_count() or 1),
+                value=st.session_state.transcription_workers,
+                help="Number of CPU processes used to transcribe long recordings in parallel"
+            )
+
+            with st.expander("Whisper Model Cache"):
+                cache_stats = get_model_registry().get_stats()
+                st.markdown(f"**Loaded:** {', '.join(cache_stats['loaded_models']) or 'none'}")
+                budget = f"{cache_stats['max_mb']:.0f} MB" if cache_stats["max_mb"] else "unbounded"
+                st.markdown(f"**Memory:** {cache_stats['memory_mb']:.0f} MB / {budget}")
+                st.markdown(f"**Hits / Misses:** {cache_stats['hits']} / {cache_stats['misses']} ({cache_stats['hit_rate']:.0%})")
+                st.markdown(f"**Evictions:** {cache_stats['evictions']}")
+                warmup_status = get_warmup_status()
+                if warmup_status["state"] != "idle":
+                    st.markdown(f"**Warm-up:** {warmup_status['state']} ({', '.join(warmup_status['models']) or '...'})")
+                st.markdown(f"**Load time:** {cache_stats['load_seconds_total']:.1f}s total, {cache_stats['last_load_seconds']:.1f}s last")
+
+            with st.expander("Document Extraction Cache"):
+                extraction_stats = get_extraction_cache().get_stats()
+                st.markdown(f"**Entries:** {extraction_stats['entries']} ({extraction_stats['memory_mb']:.1f} / {extraction_stats['max_mb']:.0f} MB)")
+                st.markdown(
+                    f"**Hits:** {extraction_stats['memory_hits']} memory, {extraction_stats['disk_hits']} disk, "
+                    f"{extraction_stats['misses']} misses ({extraction_stats['hit_rate']:.0%})"
+                )
+                st.markdown(f"**Disk tier:** {'on' if extraction_stats['disk_enabled'] else 'off'}")
+
+            with st.expander("Groq Request Queue"):
+                queue_stats = get_groq_scheduler().get_stats()
+                st.markdown(f"**Queue depth:** {queue_stats['queue_depth']} (max {queue_stats['max_queue_depth']})")
+                st.markdown(f"**Wait:** {queue_stats['wait_seconds_avg']:.1f}s avg, {queue_stats['wait_seconds_max']:.1f}s max")
+                st.markdown(f"**Requests:** {queue_stats['requests']} ({queue_stats['retries']} retries, {queue_stats['failures']} failed)")
+                st.markdown(f"**Rate limited:** {queue_stats['throttled']} times")
+                if client is not None:
+                    # Shows the last background probe; never waits on the API
+                    health = check_groq_health()
+                    if health["ok"] is None:
+                        st.markdown("**API:** checking...")
+                    elif health["ok"]:
+                        checked = datetime.fromtimestamp(health["checked_at"]).strftime("%H:%M:%S")
+                        st.markdown(f"**API:** reachable ({health['latency_ms']:.0f} ms, checked at {checked})")
+                    else:
+                        st.warning(f"Groq API unreachable: {health['error']}")
+
+            llm_cache = get_llm_cache()
+            if llm_cache is not None:
+                with st.expander("LLM Response Cache"):
+                    llm_stats = llm_cache.get_stats()
+                    st.markdown(f"**Entries:** {llm_stats['entries']} ({llm_stats['size_mb']:.1f} / {llm_stats['max_mb']:.0f} MB)")
+                    st.markdown(f"**Hits / Misses:** {llm_stats['hits']} / {llm_stats['misses']} ({llm_stats['hit_rate']:.0%})")
+                    st.markdown(f"**Shared in-flight calls:** {llm_stats['coalesced']}")
+                    st.markdown(f"**Expired / Evicted:** {llm_stats['expired']} / {llm_stats['evictions']}")
             
             # Add language selection only for Pro users
             if st.session_state.is_pro:
@@ -211,6 +296,12 @@ def main():
                 st.session_state.summary_language = "English"
                 # Default to standard sentiment analysis for non-Pro users
                 st.session_state.sentiment_analysis_approach = "standard"
+
+            st.session_state.combined_analysis = st.checkbox(
+                "Single-call summary + sentiment",
+                value=st.session_state.combined_analysis,
+                help="Send the transcript to the model once and get the summary and sentiment back together"
+            )
         
         # Main content area (full width)
         with st.container():
@@ -229,53 +320,114 @@ def main():
                 4. See latest news and insights
                 """)
         if uploaded_file:
-            file_path_or_text = extract_text_from_file(uploaded_file)
+            is_media = uploaded_file.type.startswith("audio/") or uploaded_file.type.startswith("video/")
+
+            # Reuse the transcript of identical audio before decoding anything
+            cached_transcript = None
+            if is_media:
+                transcript_key = transcript_cache_key(
+                    hash_uploaded_file(uploaded_file),
+                    st.session_state.whisper_model_size,
+                    st.session_state.whisper_quantized,
+                )
+                cached_transcript = get_transcript_cache().get(transcript_key)
+
+            # Audio uploads are decoded straight from the upload buffer when possible
+            audio_samples = None
+            if not cached_transcript and uploaded_file.type.startswith("audio/"):
+                audio_samples = load_audio_from_upload(uploaded_file)
+
+            if cached_transcript or audio_samples is not None or not is_media:
+                file_path_or_text = None
+            else:
+                file_path_or_text = extract_text_from_file(uploaded_file)
 
-            if uploaded_file.type.startswith("audio/") or uploaded_file.type.startswith("video/"):
-                if file_path_or_text:  # Only proceed if audio extraction was successful
+            if is_media:
+                # Only proceed if audio extraction was successful
+                if cached_transcript or audio_samples is not None or file_path_or_text:
                     with st.spinner("Processing audio..."):
-                        # First preprocess the audio
-                        enhanced_audio_path = preprocess_audio(file_path_or_text)
-                        
-                        # Then transcribe it
-                        transcript = transcribe_with_transformers_whisper(
-                            enhanced_audio_path,
-                            st.session_state.whisper_model_size,
-                        )
+                        if cached_transcript:
+                            st.caption("Loaded transcript from cache")
+                            transcript = cached_transcript["transcript"]
+                            transcript_words = cached_transcript["words"]
+                        else:
+                            if audio_samples is not None:
+                                # Already enhanced in memory, no temporary files involved
+                                enhanced_audio = audio_samples
+                            else:
+                                # First preprocess the audio
+                                enhanced_audio = preprocess_audio(file_path_or_text)
+
+                            # Skip silence so Whisper only sees speech
+                            speech_audio, offset_map, vad_stats = remove_silence(enhanced_audio)
+                            if vad_stats["total_seconds"]:
+                                skipped_share = vad_stats["skipped_seconds"] / vad_stats["total_seconds"]
+                                st.caption(
+                                    f"Skipped {vad_stats['skipped_seconds']:.0f}s of silence "
+                                    f"({skipped_share:.0%} of {vad_stats['total_seconds']:.0f}s) before transcription"
+                                )
+
+                            # Then transcribe it
+                            transcript, transcript_words = transcribe_with_transformers_whisper(
+                                speech_audio,
+                                st.session_state.whisper_model_size,
+                                offset_map=offset_map,
+                                return_words=True,
+                            )
+                            if not transcript.startswith("Transcription failed"):
+                                get_transcript_cache().set(
+                                    transcript_key, {"transcript": transcript, "words": transcript_words}
+                                )
+
+                            if file_path_or_text:
+                                try:
+                                    os.unlink(file_path_or_text)  # Clean up original audio
+                                    if enhanced_audio != file_path_or_text:
+                                        os.unlink(enhanced_audio)  # Clean up enhanced audio
+                                    if speech_audio != enhanced_audio:
+                                        os.unlink(speech_audio)  # Clean up speech-only audio
+                                except Exception as e:
+                                    st.warning(f"Error cleaning up temporary files: {e}")
+
+                        # Word timestamps point at the original recording, not the trimmed audio
+                        st.session_state.transcript_words = transcript_words
                         
                         # Improve transcript quality
                         transcript = improve_transcript_quality(transcript)
                         
                         # Set text_to_summarize to the transcript
                         text_to_summarize = transcript
+                        text_stats = measure_text(transcript, SUMMARY_CHUNK_CHARS)
                         
                         # Show the transcript to the user
                         with st.expander("View Transcript"):
                             st.write(transcript)
-                        
-                        try:
-                            os.unlink(file_path_or_text)  # Clean up original audio
-                            if enhanced_audio_path != file_path_or_text:
-                                os.unlink(enhanced_audio_path)  # Clean up enhanced audio
-                        except Exception as e:
-                            st.warning(f"Error cleaning up temporary files: {e}")
                 else:
                     st.error("Failed to extract audio from the uploaded file.")
                     return  # Stop processing if audio extraction failed
             else:
-                text_to_summarize = file_path_or_text
+                # Documents are hashed, counted and chunked in the same pass that extracts them
+                text_to_summarize, text_stats = extract_document_text(uploaded_file, SUMMARY_CHUNK_CHARS)
+                pdf_stats = st.session_state.pop("pdf_extraction_stats", None)
+                if pdf_stats and pdf_stats["pages"]:  # An empty PDF has no slowest page
+                    slowest_page, slowest_seconds = slowest_pages(pdf_stats, 1)[0]
+                    st.caption(
+                        f"Extracted {pdf_stats['pages']} pages in {pdf_stats['seconds']:.1f}s "
+                        f"with {pdf_stats['workers']} worker(s); slowest page {slowest_page} "
+                        f"took {slowest_seconds:.2f}s"
+                    )
 
             if text_to_summarize:
-                content_hash = hashlib.sha256(text_to_summarize.encode()).hexdigest()
+                content_hash = text_stats["sha256"]
 
                 # Display content processing in a card
                 st.markdown("### Content Analysis")
                 with st.container():
                     processing_cols = st.columns(4)
                     with processing_cols[0]:
-                        st.metric("File Size", f"{len(text_to_summarize)/1000:.1f} KB")
+                        st.metric("File Size", f"{text_stats['chars']/1000:.1f} KB")
                     with processing_cols[1]:
-                        st.metric("Word Count", f"{len(text_to_summarize.split())}")
+                        st.metric("Word Count", f"{text_stats['words']}")
                     with processing_cols[2]:
                         content_type = "Audio/Video" if uploaded_file.type.startswith(("audio/", "video/")) else "Document"
                         st.metric("Content Type", content_type)
@@ -316,38 +468,91 @@ def main():
                     render_pro_feature_banner("Upgrade to Pro for content credibility verification")
 
                 # Summarization and Analysis
-                with st.spinner("Summarizing with AI..."):
-                    if client:
-                        # Generate summary in English first
-                        summary_english = summarize_text_groq(text_to_summarize, client)
-                        sentiment_english = analyze_sentiment(text_to_summarize, client)
-                        
-                        # Translate to target language if Pro user and not English
-                        target_lang = st.session_state.summary_language
-                        if target_lang != "English" and st.session_state.is_pro:
-                            summary = translate_to_language(summary_english, target_lang, client)
-                            sentiment = translate_to_language(sentiment_english, target_lang, client)
-                        else:
-                            summary = summary_english
-                            sentiment = sentiment_english
+                related_news = None
+                # Results are translated to the target language (Pro only), and related news
+                # is fetched from the English summary as soon as it is ready
+                target_lang = st.session_state.summary_language
+                news_fetcher = (
+                    (lambda summary_text: fetch_related_news(summary_text, news_api_key))
+                    if news_api_key else None
+                )
+                # Unless the single-call mode is on, summary and sentiment are generated
+                # concurrently and streamed into their boxes below
+                streaming = client is not None and not st.session_state.combined_analysis
+                if streaming:
+                    analysis = stream_summary_and_analysis(
+                        text_to_summarize,
+                        client,
+                        target_language=target_lang if st.session_state.is_pro else None,
+                        sentiment_approach=st.session_state.sentiment_analysis_approach,
+                        chunk_offsets=text_stats["chunks"],
+                        related_news_fetcher=news_fetcher,
+                    )
+                elif client:
+                    with st.spinner("Summarizing with AI..."):
+                        analysis = summarize_and_analyze(
+                            text_to_summarize,
+                            client,
+                            target_language=target_lang if st.session_state.is_pro else None,
+                            sentiment_approach=st.session_state.sentiment_analysis_approach,
+                            chunk_offsets=text_stats["chunks"],
+                            related_news_fetcher=news_fetcher,
+                            combined=True,
+                        )
+                    summary = analysis["summary"]
+                    sentiment = analysis["sentiment"]
+                    related_news = analysis["related_news"]
+                    timings = analysis["timings"]
+                    if analysis["combined"]:
+                        st.caption(
+                            f"Analysis took {timings['total']:.1f}s with a single summary + sentiment call "
+                            f"(~{analysis['tokens_saved']:,} prompt tokens saved)"
+                        )
                     else:
-                        summary = "Summary unavailable. API client not initialized."
-                        sentiment = "Sentiment analysis unavailable. API client not initialized."
+                        st.caption("Single-call analysis unavailable for this content; used separate calls")
+                        st.caption(
+                            f"Analysis took {timings['total']:.1f}s "
+                            f"(summary {timings.get('summary', 0):.1f}s, sentiment {timings.get('sentiment', 0):.1f}s, run concurrently)"
+                        )
+                else:
+                    summary = "Summary unavailable. API client not initialized."
+                    sentiment = "Sentiment analysis unavailable. API client not initialized."
 
                 # Display the summary and sentiment
                 st.markdown("### Summary")
-                render_summary_box(summary)
+                if streaming:
+                    summary_box = st.empty()
+                    summary = render_summary_box(analysis["summary_english"], summary_box)
+                    if analysis["summary"] is not None:
+                        # The English draft is replaced by its translation as that streams in
+                        summary = render_summary_box(analysis["summary"], summary_box)
+                else:
+                    render_summary_box(summary)
 
                 # Display sentiment analysis with type label for Pro users
                 sentiment_type = st.session_state.sentiment_analysis_approach.capitalize()
                 st.markdown(f"### Sentiment Analysis")
-                
+                if streaming:
+                    sentiment_box = st.empty()
+                    sentiment = render_sentiment_box(analysis["sentiment_english"], sentiment_type, sentiment_box)
+                    if analysis["sentiment"] is not None:
+                        sentiment = render_sentiment_box(analysis["sentiment"], sentiment_type, sentiment_box)
+                    if analysis["related_news"] is not None:
+                        related_news = analysis["related_news"].result()
+                    # Every step is timed from the start, so the slowest one is the total
+                    timings = analysis["timings"]
+                    total = max(seconds for step, seconds in timings.items() if not step.endswith("_ttft"))
+                    st.caption(
+                        f"First tokens after {timings.get('summary_ttft', timings['summary']):.1f}s (summary) and "
+                        f"{timings.get('sentiment_ttft', timings['sentiment']):.1f}s (sentiment); "
+                        f"analysis took {total:.1f}s, streamed concurrently"
+                    )
+                else:
+                    render_sentiment_box(sentiment, sentiment_type)
+
                 # For non-Pro users, show a hint that advanced sentiment is available
                 if not st.session_state.is_pro and sentiment_type == "Standard":
-                    render_sentiment_box(sentiment, "Standard")
                     render_pro_feature_banner("Upgrade to Pro for detailed and emotional sentiment analysis")
-                else:
-                    render_sentiment_box(sentiment, sentiment_type)
 
                 # PDF download option only for Pro users
                 if st.session_state.is_pro:
@@ -383,12 +588,10 @@ def main():
                     # Show upgrade banner for PDF download
                     render_pro_feature_banner("Upgrade to Pro to download summaries as PDF")
                 
-                # Fetch and display related news AFTER summary is created
+                # Related news was fetched from the English summary (better keywords)
+                # while the translations ran
                 if news_api_key and client:
-                    with st.spinner("Fetching latest news..."):
-                        # Use summary_english for related news search (better keywords)
-                        related_news = fetch_related_news(summary_english, news_api_key)
-                        st.session_state.news_articles = related_news
+                    st.session_state.news_articles = related_news
                     
                                         
                     # Show related news after summary
@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class WhisperModelRegistry:
+    """Process-wide cache of loaded Whisper ASR pipelines.
+
+    Pipelines are keyed by (model size, device, dtype) and shared by every
+    Streamlit session in the process. When the estimated memory of the loaded
+    models exceeds the budget, the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self._pipelines = OrderedDict()  # key -> (pipeline, size in bytes)
+        self._loading = {}  # key -> Event set when an in-flight load finishes
+        self._lock = threading.RLock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "waits": 0,
+            "evictions": 0,
+            "load_count": 0,
+            "load_seconds_total": 0.0,
+            "last_load_seconds": 0.0,
+        }
+
+    def get_pipeline(self, model_size, device="cpu", dtype="float32"):
+        """Return a cached pipeline, loading it on a miss.
+
+        Loads are single-flight: if another thread (e.g. the warm-up thread) is
+        already loading the same key, the caller waits for that load instead of
+        starting a second one.
+        """
+        key = (model_size, device, dtype)
+        with self._lock:
+            if key in self._pipelines:
+                self._pipelines.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._pipelines[key][0]
+            loading = self._loading.get(key)
+            if loading is None:
+                loading = self._loading[key] = threading.Event()
+                self.stats["misses"] += 1
+                owner = True
+            else:
+                self.stats["waits"] += 1
+                owner = False
+
+        if not owner:
+            loading.wait()
+            with self._lock:
+                if key in self._pipelines:
+                    self._pipelines.move_to_end(key)
+                    return self._pipelines[key][0]
+            # The other load failed; try again ourselves
+            return self.get_pipeline(model_size, device, dtype)
+
+        try:
+            start = time.perf_counter()
+            transcriber = self._load_pipeline(model_size, device, dtype)
+            elapsed = time.perf_counter() - start
+            size = _estimate_model_bytes(transcriber)
+
+            with self._lock:
+                self.stats["load_count"] += 1
+                self.stats["load_seconds_total"] += elapsed
+                self.stats["last_load_seconds"] = elapsed
+                self._pipelines[key] = (transcriber, size)
+                self._evict_to_budget(keep=key)
+            return transcriber
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def is_loading(self, model_size, device="cpu", dtype="float32"):
+        with self._lock:
+            return (model_size, device, dtype) in self._loading
+
+    def _load_pipeline(self, model_size, device, dtype):
+        import torch
+        from transformers import pipeline
+
+        model_name = f"openai/whisper-{model_size}"
+        if dtype == "int8":
+            # Dynamic int8 quantization of the linear layers only runs on CPU
+            transcriber = pipeline(
+                "automatic-speech-recognition",
+                model=model_name,
+                device="cpu",
+                torch_dtype=torch.float32,
+            )
+            transcriber.model = torch.ao.quantization.quantize_dynamic(
+                transcriber.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+            return transcriber
+
+        torch_dtype = getattr(torch, dtype)
+        return pipeline(
+            "automatic-speech-recognition",
+            model=model_name,
+            device=device,
+            torch_dtype=torch_dtype,
+        )
+
+    def _evict_to_budget(self, keep=None):
+        """Drop least recently used pipelines until the budget is respected."""
+        if self.max_bytes is None:
+            return
+        evicted = False
+        while self.memory_bytes() > self.max_bytes and len(self._pipelines) > 1:
+            oldest = next(iter(self._pipelines))
+            if oldest == keep:
+                break
+            del self._pipelines[oldest]
+            self.stats["evictions"] += 1
+            evicted = True
+        if not evicted:
+            return
+
+        # Give the freed memory back before the next load
+        try:
+            import gc
+            gc.collect()
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+
+    def memory_bytes(self):
+        """Estimated memory used by all cached pipelines."""
+        with self._lock:
+            return sum(size for _, size in self._pipelines.values())
+
+    def loaded_models(self):
+        """Keys of the cached pipelines, least recently used first."""
+        with self._lock:
+            return list(self._pipelines.keys())
+
+    def clear(self):
+        with self._lock:
+            self._pipelines.clear()
+
+    def get_stats(self):
+        """Snapshot of hit/miss/load-time counters for budget sizing."""
+        with self._lock:
+            stats = dict(self.stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+            stats["memory_mb"] = self.memory_bytes() / (1024 * 1024)
+            stats["max_mb"] = self.max_bytes / (1024 * 1024) if self.max_bytes else None
+            stats["loaded_models"] = ["/".join(key) for key in self._pipelines]
+            return stats
+
+
+def _estimate_model_bytes(transcriber):
+    """Approximate resident size of a pipeline from its state dict.
+
+    The state dict is used rather than ``parameters()`` so the packed weights of
+    dynamically quantized layers are counted too.
+    """
+    model = getattr(transcriber, "model", None)
+    if model is None:
+        return 0
+
+    def tensor_bytes(value):
+        if isinstance(value, (tuple, list)):
+            return sum(tensor_bytes(item) for item in value)
+        if hasattr(value, "numel") and hasattr(value, "element_size"):
+            return value.numel() * value.element_size()
+        return 0
+
+    return sum(tensor_bytes(value) for value in model.state_dict().values())
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Return the registry shared by all sessions in this process."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            from config import WHISPER_CACHE_MAX_MB
+            _registry = WhisperModelRegistry(max_bytes=WHISPER_CACHE_MAX_MB * 1024 * 1024)
+        return _registry
+
+
+def get_whisper_pipeline(model_size, device="cpu", dtype="float32"):
+    """Shortcut for ``get_model_registry().get_pipeline(...)``."""
+    return get_model_registry().get_pipeline(model_size, device, dtype)
+
+
+_warmup_thread = None
+_warmup_status = {"state": "idle", "models": [], "seconds": 0.0, "error": None}
+_warmup_lock = threading.Lock()
+
+
+def _warm_up(model_sizes, dtype):
+    import numpy as np
+    import torch
+
+    device = "cuda" if torch.cuda.is_available() and dtype != "int8" else "cpu"
+    start = time.perf_counter()
+    try:
+        for model_size in model_sizes:
+            transcriber = get_whisper_pipeline(model_size, device, dtype)
+            # One dummy inference initializes kernels and allocator pools
+            transcriber({"raw": np.zeros(16000, dtype=np.float32), "sampling_rate": 16000})
+            _warmup_status["models"].append(model_size)
+        _warmup_status["state"] = "done"
+    except Exception as e:
+        _warmup_status["state"] = "failed"
+        _warmup_status["error"] = str(e)
+    finally:
+        _warmup_status["seconds"] = time.perf_counter() - start
+
+
+def start_warmup(model_sizes, dtype="float32"):
+    """Preload Whisper models and run a dummy inference on a background thread.
+
+    Safe to call on every script rerun: only the first call in a process starts
+    the thread. The UI never waits on it; a transcription that needs a model
+    still being warmed up waits for that load instead of loading it again.
+    """
+    global _warmup_thread
+    if not model_sizes:
+        return
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return
+        _warmup_status["state"] = "running"
+        _warmup_thread = threading.Thread(
+            target=_warm_up, args=(list(model_sizes), dtype), name="whisper-warmup", daemon=True
+        )
+        _warmup_thread.start()
+
+
+def get_warmup_status():
+    """State of the background warm-up: idle, running, done or failed."""
+    return dict(_warmup_status, models=list(_warmup_status["models"]))
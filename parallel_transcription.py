@@ -0,0 +1,124 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_utils import (
+    WHISPER_SAMPLE_RATE,
+    get_audio_duration,
+    window_starts,
+    read_audio_window,
+    transcribe_window_batch,
+    stitch_window_results,
+)
+from perf_utils import ProcessPoolRegistry
+
+# Pipeline loaded once in each worker process by _init_worker
+_worker_transcriber = None
+
+
+def threads_per_worker(num_workers):
+    """Split the available cores evenly so workers don't oversubscribe the CPU."""
+    return max(1, (os.cpu_count() or 1) // num_workers)
+
+
+def _init_worker(model_size, dtype, num_threads):
+    """Pin torch thread counts and load one model for this worker."""
+    global _worker_transcriber
+    import torch
+
+    torch.set_num_threads(num_threads)
+    torch.set_num_interop_threads(1)
+
+    from model_registry import WhisperModelRegistry
+    _worker_transcriber = WhisperModelRegistry().get_pipeline(model_size, "cpu", dtype)
+
+
+def _transcribe_segment(audio_path, starts, window_s, batch_size, audio_offset_s=0.0):
+    """Transcribe the windows of one segment inside a worker process.
+
+    ``audio_path`` is either a file path or the segment's own samples, which
+    start ``audio_offset_s`` seconds into the recording.
+    """
+    results = []
+    for offset in range(0, len(starts), batch_size):
+        batch = [(start_s, read_audio_window(audio_path, start_s - audio_offset_s, window_s))
+                 for start_s in starts[offset:offset + batch_size]]
+        results.extend(transcribe_window_batch(_worker_transcriber, batch, batch_size))
+    return results
+
+
+def split_segments(starts, num_segments):
+    """Split window start times into contiguous, roughly equal segments."""
+    num_segments = max(1, min(num_segments, len(starts)))
+    size, remainder = divmod(len(starts), num_segments)
+    segments = []
+    offset = 0
+    for index in range(num_segments):
+        end = offset + size + (1 if index < remainder else 0)
+        segments.append(starts[offset:end])
+        offset = end
+    return segments
+
+
+_pools = ProcessPoolRegistry(max_idle=1)  # Each idle pool holds one model per worker
+
+
+def transcription_pool(model_size, num_workers, dtype="float32"):
+    """Lease a process pool whose workers have ``model_size`` loaded (a context manager).
+
+    Pools are kept alive between calls so workers only pay the model load
+    once. Sessions with different settings get their own pools; a pool is
+    only shut down once no session is using it.
+    """
+    def create():
+        # Spawn keeps torch's thread pools out of the forked children
+        return ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, dtype, threads_per_worker(num_workers)),
+        )
+
+    return _pools.lease((model_size, num_workers, dtype), create)
+
+
+def transcribe_parallel(audio_path, model_size, num_workers, window_s=30.0, overlap_s=5.0,
+                        batch_size=4, dtype="float32", progress_callback=None):
+    """Transcribe a file across a pool of CPU worker processes.
+
+    The recording is cut into the same overlapping windows as chunked mode, the
+    windows are split into one contiguous segment per worker (each worker reads
+    its own audio from disk), and the results are merged in order and stitched.
+    In-memory 16 kHz arrays are accepted too; each worker is then sent only
+    the samples of its own segment. Returns the stitched words.
+    """
+    total_s = get_audio_duration(audio_path)
+    starts = window_starts(total_s, window_s, overlap_s)
+    segments = split_segments(starts, num_workers * 2)  # Extra segments keep workers busy until the end
+
+    results = []
+    with transcription_pool(model_size, num_workers, dtype) as pool:
+        futures = []
+        for segment in segments:
+            if isinstance(audio_path, np.ndarray):
+                first = int(round(segment[0] * WHISPER_SAMPLE_RATE))
+                last = int(round((segment[-1] + window_s) * WHISPER_SAMPLE_RATE))
+                futures.append(pool.submit(
+                    _transcribe_segment, audio_path[first:last], segment, window_s, batch_size, segment[0]
+                ))
+            else:
+                futures.append(pool.submit(_transcribe_segment, audio_path, segment, window_s, batch_size))
+
+        done_windows = 0
+        for future in futures:
+            segment_results = future.result()
+            results.extend(segment_results)
+            done_windows += len(segment_results)
+            if progress_callback:
+                progress_callback(min(done_windows * (window_s - overlap_s), total_s), total_s)
+
+    windows = [(start_s, output, index == len(results) - 1)
+               for index, (start_s, output) in enumerate(results)]
+    return stitch_window_results(windows, window_s, overlap_s)
@@ -1,29 +1,42 @@
 # pdf_utils.py
 import streamlit as st
-from fpdf import FPDF
 import base64
 import os
 import tempfile
 from datetime import datetime
+from functools import lru_cache
 
-class SummaryPDF(FPDF):
-    def header(self):
-        # Set up header with logo and title
-        self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'Poke Summarizer - Meetings and News Summary', 0, 1, 'C')
-        self.ln(5)
-        
-    def footer(self):
-        # Add footer with page numbers
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-        self.cell(0, 10, f'Generated on {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 0, 'R')
+@lru_cache(maxsize=None)
+def _summary_pdf_class():
+    """Build the PDF class on first use so fpdf is only imported when exporting."""
+    from fpdf import FPDF
+
+    class SummaryPDF(FPDF):
+        def header(self):
+            # Set up header with logo and title
+            self.set_font('Arial', 'B', 15)
+            self.cell(0, 10, 'Poke Summarizer - Meetings and News Summary', 0, 1, 'C')
+            self.ln(5)
+            
+        def footer(self):
+            # Add footer with page numbers
+            self.set_y(-15)
+            self.set_font('Arial', 'I', 8)
+            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+            self.cell(0, 10, f'Generated on {datetime.now().strftime("%Y-%m-%d %H:%M")}', 0, 0, 'R')
+
+    return SummaryPDF
+
+def __getattr__(name):
+    # Keep `from pdf_utils import SummaryPDF` working without importing fpdf eagerly
+    if name == "SummaryPDF":
+        return _summary_pdf_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def create_summary_pdf(summary, sentiment):
     """Create a PDF with the Meetings and News summary and analysis"""
     # Create a Unicode-compatible PDF
-    pdf = SummaryPDF()
+    pdf = _summary_pdf_class()()
     # Add a font that supports various languages
     pdf.add_page()
     
@@ -64,6 +77,7 @@ def create_summary_pdf(summary, sentiment):
     except Exception as e:
         st.error(f"Error creating PDF: {e}")
         # Create a fallback basic PDF if original fails
+        from fpdf import FPDF
         basic_pdf = FPDF()
         basic_pdf.add_page()
         basic_pdf.set_font('Arial', 'B', 16)
@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(timings, name):
+    """Record the wall time of the ``with`` block in ``timings[name]`` (seconds)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def timed_stream(deltas, timings, name, start=None):
+    """Pass ``deltas`` through, recording ``timings[name + "_ttft"]`` and ``timings[name]``.
+
+    The first is the time to the first non-empty delta, the second the time
+    until the stream is exhausted, both in seconds since ``start`` (a
+    ``time.perf_counter()`` value; defaults to when iteration begins).
+    """
+    if start is None:
+        start = time.perf_counter()
+    try:
+        for delta in deltas:
+            if delta and name + "_ttft" not in timings:
+                timings[name + "_ttft"] = time.perf_counter() - start
+            yield delta
+    finally:
+        timings[name] = time.perf_counter() - start
+
+
+def _script_run_context():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx()
+    except ImportError:
+        return None
+
+
+def _submit(executor, context, function, args, kwargs):
+    def run():
+        if context is not None:
+            from streamlit.runtime.scriptrunner import add_script_run_ctx
+            add_script_run_ctx(threading.current_thread(), context)
+        return function(*args, **kwargs)
+
+    return executor.submit(run)
+
+
+def submit_with_context(executor, function, *args, **kwargs):
+    """Submit ``function`` to ``executor`` so it can still call Streamlit.
+
+    The worker thread is attached to the submitting script's run context, so
+    ``st.error``/``st.warning`` and ``st.session_state`` keep working inside
+    the task instead of warning about a missing ScriptRunContext.
+    """
+    return _submit(executor, _script_run_context(), function, args, kwargs)
+
+
+def then(executor, future, function, *args, **kwargs):
+    """Run ``function(result, *args, **kwargs)`` on ``executor`` once ``future`` finishes.
+
+    Returns a future for the chained call, which starts as soon as its input
+    is ready rather than after unrelated work, without holding a worker thread
+    while it waits. Callers must wait for it before shutting the executor down.
+    """
+    from concurrent.futures import Future
+
+    context = _script_run_context()
+    chained = Future()
+
+    def start(done):
+        try:
+            inner = _submit(executor, context, function, (done.result(),) + args, kwargs)
+            inner.add_done_callback(lambda finished: _copy_result(finished, chained))
+        except BaseException as e:
+            chained.set_exception(e)
+
+    future.add_done_callback(start)
+    return chained
+
+
+def _copy_result(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class BackgroundStream:
+    """Run a generator on ``executor`` and iterate its items from another thread.
+
+    The generator starts immediately and is consumed through a queue, so a
+    slow consumer (the script thread rendering another stream) doesn't hold
+    it up. Iterate once for the deltas; ``result()`` waits for the joined,
+    stripped text. Errors raised by the generator are re-raised from both.
+    """
+
+    _DONE = object()
+
+    def __init__(self, executor, generator_function, *args, **kwargs):
+        import queue
+
+        self._queue = queue.Queue()
+        self._future = submit_with_context(executor, self._run, generator_function, args, kwargs)
+
+    def _run(self, generator_function, args, kwargs):
+        parts = []
+        try:
+            for delta in generator_function(*args, **kwargs):
+                parts.append(delta)
+                self._queue.put(delta)
+        finally:
+            self._queue.put(self._DONE)
+        return "".join(parts).strip()
+
+    def __iter__(self):
+        while True:
+            delta = self._queue.get()
+            if delta is self._DONE:
+                self._future.result()  # Re-raise the generator's error, if any
+                return
+            yield delta
+
+    def result(self, timeout=None):
+        return self._future.result(timeout)
+
+
+class ProcessPoolRegistry:
+    """Process pools keyed by their configuration, shared by every session in the process.
+
+    ``lease(key, factory)`` yields the pool for ``key``, creating it with
+    ``factory()`` on first use. Leases are counted, so a pool is never shut
+    down while a session is using it; once more than ``max_idle`` pools are
+    idle, the least recently used idle ones are shut down.
+    """
+
+    def __init__(self, max_idle=1):
+        from collections import OrderedDict
+
+        self.max_idle = max_idle
+        self._pools = OrderedDict()  # key -> [pool, active leases], least recently used first
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self, key, factory):
+        with self._lock:
+            entry = self._pools.get(key)
+            if entry is None:
+                entry = self._pools[key] = [factory(), 0]
+            self._pools.move_to_end(key)
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                idle = [pool_key for pool_key, (_, leases) in self._pools.items() if leases == 0]
+                victims = [self._pools.pop(pool_key)[0] for pool_key in idle[:max(0, len(idle) - self.max_idle)]]
+            for pool in victims:
+                pool.shutdown(wait=False)
@@ -1,9 +1,16 @@
 import streamlit as st
 import tempfile
 import os
-from PyPDF2 import PdfReader
-from docx import Document
-from moviepy.video.io.VideoFileClip import VideoFileClip
+import shutil
+import time
+
+# Bump whenever preprocess_audio or remove_silence change what Whisper sees,
+# so cached transcripts from the old pipeline are not reused
+PREPROCESSING_VERSION = 2
+
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+DOCUMENT_TYPES = {"text/plain": "TXT", "application/pdf": "PDF", DOCX_TYPE: "DOCX"}
+
 
 def extract_text_from_file(uploaded_file):
     """Extract text from TXT, PDF, DOCX, audio, or video files."""
@@ -11,83 +18,259 @@ def extract_text_from_file(uploaded_file):
     if uploaded_file is None:
         return None
 
-    if uploaded_file.type == "text/plain":
-        return uploaded_file.read().decode("utf-8")
+    if uploaded_file.type in DOCUMENT_TYPES:
+        text, _ = extract_document_text(uploaded_file)
+        return text
 
-    elif uploaded_file.type == "application/pdf":
-        try:
-            pdf_reader = PdfReader(uploaded_file)
-            text = "\n".join([page.extract_text() for page in pdf_reader.pages if page.extract_text()])
-            if not text.strip():
-                return "No extractable text found in PDF."
-            return text
-        except Exception as e:
-            st.error(f"Error extracting text from PDF: {e}")
-            return "Failed to extract text from PDF file."
-
-    elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        try:
-            doc = Document(uploaded_file)
-            text = "\n".join([para.text for para in doc.paragraphs if para.text])
-            return text
-        except Exception as e:
-            st.error(f"Error extracting text from DOCX: {e}")
-            return "Failed to extract text from DOCX file."
-
-    elif uploaded_file.type.startswith("audio/"):
+    if uploaded_file.type.startswith("audio/"):
         with st.spinner("Processing audio file and transcribing..."):
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                audio_path = tmp_file.name
+            audio_path = spool_upload_to_disk(uploaded_file)
             return audio_path  # Return audio path for transcription in separate function
 
     elif uploaded_file.type.startswith("video/"):
         with st.spinner("Extracting audio from video..."):
+            video_path = None
             try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_video:
-                    tmp_video.write(uploaded_file.getvalue())
-                    video_path = tmp_video.name
+                from audio_utils import extract_audio_ffmpeg, get_ffmpeg_executable
 
+                video_path = spool_upload_to_disk(uploaded_file)
                 audio_path = tempfile.NamedTemporaryFile(delete=False, suffix=".wav").name
                 try:
-                    video = VideoFileClip(video_path)
-                    video.audio.write_audiofile(audio_path, logger=None)
-                    video.close()
+                    if get_ffmpeg_executable():
+                        # Pipe mono 16 kHz PCM straight out of the container
+                        extract_audio_ffmpeg(video_path, audio_path)
+                    else:
+                        from moviepy.video.io.VideoFileClip import VideoFileClip
+                        video = VideoFileClip(video_path)
+                        video.audio.write_audiofile(audio_path, logger=None)
+                        video.close()
+                except ImportError:
+                    raise
                 except Exception as e:
                     st.error(f"Error extracting audio: {e}")
                     return None  # Indicate failure
 
                 return audio_path  # Return audio path for transcription
             except ImportError:
-                st.error("MoviePy not installed. Please install with: pip install moviepy")
+                st.error("ffmpeg not found and MoviePy not installed. Please install ffmpeg or run: pip install moviepy")
                 return None
             except Exception as e:
                 st.error(f"Error processing video: {str(e)}")
                 return None
+            finally:
+                if video_path:
+                    try:
+                        os.unlink(video_path)  # Only the extracted audio is needed from here on
+                    except OSError:
+                        pass
     return None
 
 
+def iter_document_text(uploaded_file):
+    """Yield the text of a TXT, PDF or DOCX upload piece by piece.
+
+    The pieces (decoded blocks, pages, paragraphs) concatenate to the full
+    text, so callers can hash, count and chunk it while it is being extracted.
+    Extraction errors propagate to the caller.
+    """
+    from document_extraction import (
+        decode_text_buffer, iter_docx_text, iter_pdf_pages, join_segments, pdf_page_stats
+    )
+
+    uploaded_file.seek(0)
+    if uploaded_file.type == "text/plain":
+        # The upload already lives in memory: decode its buffer in place rather
+        # than reading a second copy of the bytes. The text goes downstream as one
+        # piece, since joining decoded blocks would briefly hold it twice.
+        with uploaded_file.getbuffer() as buffer:
+            text, _ = decode_text_buffer(buffer)
+        yield text
+
+    elif uploaded_file.type == "application/pdf":
+        # Workers open the file themselves, so hand them a path rather than the upload
+        pdf_path = spool_upload_to_disk(uploaded_file)
+        progress_bar = st.progress(0.0, text="Extracting text from PDF...")
+
+        def update_progress(pages_done, num_pages):
+            progress_bar.progress(pages_done / num_pages, text=f"Extracted {pages_done}/{num_pages} pages")
+
+        start = time.perf_counter()
+        timings = []
+
+        def page_texts():
+            for index, text, seconds in iter_pdf_pages(pdf_path, progress_callback=update_progress):
+                timings.append((index, seconds))
+                yield text
+
+        try:
+            yield from join_segments(page_texts())
+            st.session_state.pdf_extraction_stats = pdf_page_stats(timings, start)
+        finally:
+            progress_bar.empty()
+            try:
+                os.unlink(pdf_path)
+            except OSError:
+                pass
+
+    elif uploaded_file.type == DOCX_TYPE:
+        yield from join_segments(iter_docx_text(uploaded_file))
+
+
+def extract_document_text(uploaded_file, chunk_chars=None):
+    """Extract a TXT, PDF or DOCX upload and measure it in the same pass.
+
+    Returns (text, stats), where stats are the ``TextStats`` of the text: its
+    SHA-256, character and word counts, and chunk offsets when ``chunk_chars``
+    is given. On failure the text is an error message, as before.
+
+    Results are cached by the hash of the uploaded bytes, so Streamlit reruns
+    and re-uploads of the same document skip extraction entirely.
+    """
+    import sys
+    from cache_utils import extraction_cache_key, get_extraction_cache, hash_uploaded_file
+    from document_extraction import TextStats, measure_text, stream_with_stats
+
+    cache = get_extraction_cache()
+    cache_key = extraction_cache_key(hash_uploaded_file(uploaded_file), uploaded_file.type, chunk_chars)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached["text"], cached["stats"]
+
+    label = DOCUMENT_TYPES[uploaded_file.type]
+    stats = TextStats(chunk_chars)
+    try:
+        text = "".join(stream_with_stats(iter_document_text(uploaded_file), stats))
+    except Exception as e:
+        st.error(f"Error extracting text from {label}: {e}")
+        text = f"Failed to extract text from {label} file."
+        return text, measure_text(text, chunk_chars)
+
+    if label == "PDF" and not text.strip():
+        text = "No extractable text found in PDF."
+        return text, measure_text(text, chunk_chars)
+
+    stats = stats.as_dict()
+    cache.set(cache_key, {"text": text, "stats": stats}, sys.getsizeof(text))
+    return text, stats
+
+
+def spool_upload_to_disk(uploaded_file, chunk_size=8 * 1024 * 1024):
+    """Copy an upload to a temporary file in fixed-size chunks and return its path.
+
+    Unlike ``getvalue()`` this never makes a second full copy of the upload in memory.
+    """
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
+        shutil.copyfileobj(uploaded_file, tmp_file, chunk_size)
+        return tmp_file.name
+
+
 def preprocess_audio(audio_path):
-    """Enhance audio quality before transcription."""
+    """Enhance audio quality before transcription.
+
+    The file is streamed block by block (resample, pre-emphasis with carried
+    filter state, normalization from a first-pass peak), so memory stays flat
+    even for multi-hour recordings. Formats soundfile can't stream fall back to
+    a full in-memory load with librosa.
+    """
     try:
-        import librosa
-        import soundfile as sf
-        
+        from audio_utils import preprocess_audio_to_file
+
         with st.spinner("Preprocessing audio for improved quality..."):
-            # Load audio
-            y, sr = librosa.load(audio_path, sr=16000)
-            
-            # Noise reduction
-            y_denoised = librosa.effects.preemphasis(y)
-            
-            # Normalize audio
-            y_normalized = librosa.util.normalize(y_denoised)
-            
-            # Save preprocessed audio
             processed_path = audio_path.replace('.', '_enhanced.')
-            sf.write(processed_path, y_normalized, sr)
-            
-            return processed_path
+            processed_path = os.path.splitext(processed_path)[0] + ".wav"
+            try:
+                return preprocess_audio_to_file(audio_path, processed_path)
+            except RuntimeError:
+                # soundfile can't read this container (e.g. MP3 on older libsndfile)
+                import librosa
+                import soundfile as sf
+
+                # Load audio
+                y, sr = librosa.load(audio_path, sr=16000)
+                
+                # Noise reduction
+                y_denoised = librosa.effects.preemphasis(y)
+                
+                # Normalize audio
+                y_normalized = librosa.util.normalize(y_denoised)
+                
+                # Save preprocessed audio
+                sf.write(processed_path, y_normalized, sr)
+                
+                return processed_path
     except Exception as e:
         st.warning(f"Audio preprocessing skipped: {e}")
-        return audio_path
\ No newline at end of file
+        return audio_path
+
+
+def load_audio_from_upload(uploaded_file):
+    """Decode an uploaded audio file in memory to enhanced 16 kHz float32 samples.
+
+    The upload buffer is decoded directly, then pre-emphasized and normalized in
+    place, so no temporary files are written. Returns None if the format can't
+    be decoded from memory, or if the recording is longer than
+    ``AUDIO_IN_MEMORY_MAX_SECONDS``; the temp-file path, which streams the file
+    block by block, should be used then.
+    """
+    try:
+        from audio_utils import decode_audio_file, enhance_audio_in_place, get_audio_duration
+        from config import AUDIO_IN_MEMORY_MAX_SECONDS
+
+        # Read the length from the header first; a full decode of a long
+        # recording (at its own rate and channel count) would not fit in RAM
+        uploaded_file.seek(0)
+        if get_audio_duration(uploaded_file) > AUDIO_IN_MEMORY_MAX_SECONDS:
+            return None
+
+        with st.spinner("Decoding and enhancing audio..."):
+            samples = decode_audio_file(uploaded_file)
+            return enhance_audio_in_place(samples)
+    except Exception:
+        return None
+
+
+def remove_silence(audio_path):
+    """Cut silence and other non-speech regions out of a preprocessed recording.
+
+    ``audio_path`` is a file path or an in-memory 16 kHz array. Returns
+    (speech_audio, offset_map, stats): the trimmed audio in the same form as the
+    input, a map from timestamps on the trimmed audio back to the original, and
+    how much audio was skipped. On failure the input is returned unchanged.
+    """
+    try:
+        import numpy as np
+        import soundfile as sf
+        from audio_utils import apply_vad, apply_vad_to_file, WHISPER_SAMPLE_RATE
+
+        if isinstance(audio_path, np.ndarray):
+            with st.spinner("Detecting speech and skipping silence..."):
+                return apply_vad(audio_path, WHISPER_SAMPLE_RATE)
+
+        with st.spinner("Detecting speech and skipping silence..."):
+            try:
+                streamable = sf.info(audio_path).samplerate == WHISPER_SAMPLE_RATE
+            except RuntimeError:
+                streamable = False
+
+            if streamable:
+                # Preprocessed 16 kHz file: stream it so long recordings stay in bounded memory
+                speech_path = os.path.splitext(audio_path.replace('.', '_speech.'))[0] + ".wav"
+                offset_map, stats = apply_vad_to_file(audio_path, speech_path)
+                if stats["skipped_seconds"] <= 0:
+                    return audio_path, offset_map, stats
+                return speech_path, offset_map, stats
+
+            import librosa
+
+            y, sr = librosa.load(audio_path, sr=WHISPER_SAMPLE_RATE)
+            speech, offset_map, stats = apply_vad(y, sr)
+            if stats["skipped_seconds"] <= 0:
+                return audio_path, offset_map, stats
+
+            speech_path = audio_path.replace('.', '_speech.')
+            sf.write(speech_path, speech, sr)
+            return speech_path, offset_map, stats
+    except Exception as e:
+        st.warning(f"Silence detection skipped: {e}")
+        return audio_path, [], {"total_seconds": 0.0, "skipped_seconds": 0.0, "regions": 0}
@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# Lower runs first. Short interactive calls jump ahead of bulk map-reduce chunks.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Status codes worth retrying: rate limited, or the service is briefly overloaded
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _is_retryable(error):
+    """Rate limited, overloaded, or the connection failed before a reply.
+
+    The Groq SDK's own retries are disabled (see ``external_apis``), so
+    connection errors are retried here; timeouts are not, since the call may
+    have been slow rather than lost.
+    """
+    if _status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    names = {cls.__name__ for cls in type(error).__mro__}
+    return "APIConnectionError" in names and "APITimeoutError" not in names
+
+
+def retry_after_seconds(error):
+    """The ``retry-after`` delay of a rate-limit error in seconds, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP-date form; fall back to exponential backoff
+
+
+class RateLimitScheduler:
+    """Process-wide scheduler for Groq calls with request and token budgets.
+
+    Two token buckets refill continuously: one for requests per minute and
+    one for tokens per minute (prompt plus expected completion). Callers are
+    queued by priority, then arrival order, and each call runs once it is at
+    the head of the queue and both buckets can cover it. A 429, a 503 or a
+    failed connection pauses the whole queue for the ``retry-after`` delay,
+    or for a jittered exponential backoff if there is none, and the call is
+    retried.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_retries=5,
+                 base_delay=1.0, max_delay=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._condition = threading.Condition()
+        self._queue = []  # Heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._request_budget = float(requests_per_minute)
+        self._token_budget = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "retries": 0,
+            "failures": 0,
+            "max_queue_depth": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "tokens_estimated": 0,
+        }
+
+    def _refill(self, now):
+        elapsed = now - self._refilled_at
+        self._refilled_at = now
+        self._request_budget = min(
+            self.requests_per_minute, self._request_budget + elapsed * self.requests_per_minute / 60
+        )
+        self._token_budget = min(
+            self.tokens_per_minute, self._token_budget + elapsed * self.tokens_per_minute / 60
+        )
+
+    def _seconds_until_affordable(self, tokens, now):
+        """How long until both buckets (and any pause) allow a call of ``tokens``."""
+        request_wait = max(0.0, (1 - self._request_budget) * 60 / self.requests_per_minute)
+        token_wait = max(0.0, (tokens - self._token_budget) * 60 / self.tokens_per_minute)
+        return max(request_wait, token_wait, self._paused_until - now)
+
+    def _acquire(self, tokens, priority):
+        """Block until this caller is first in line and the budgets cover ``tokens``.
+
+        Returns the tokens deducted, which is less than asked for when the call
+        is bigger than the whole bucket.
+        """
+        tokens = min(tokens, self.tokens_per_minute)  # A call bigger than the bucket waits for a full one
+        ticket = (priority, next(self._sequence))
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], len(self._queue))
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._queue[0] == ticket:
+                    wait = self._seconds_until_affordable(tokens, now)
+                    if wait <= 0:
+                        heapq.heappop(self._queue)
+                        self._request_budget -= 1
+                        self._token_budget -= tokens
+                        self._condition.notify_all()  # The next caller is now at the head
+                        return tokens
+                    self._condition.wait(timeout=wait)
+                else:
+                    self._condition.wait()
+
+    def _backoff(self, attempt, error):
+        delay = retry_after_seconds(error)
+        if delay is None:
+            # Full jitter keeps sessions that were throttled together from retrying together
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            self.stats["throttled"] += 1
+            self._condition.notify_all()
+
+    def run(self, call, estimated_tokens, priority=PRIORITY_NORMAL):
+        """Run ``call()`` within the rate limits.
+
+        Returns ``(result, charged_tokens)``, where ``charged_tokens`` is what
+        was deducted from the token bucket; pass it to ``settle`` once the
+        real usage is known. Rate-limit, overload and connection errors are retried up to
+        ``max_retries`` times; other errors, or the last retryable one,
+        propagate to the caller.
+        """
+        for attempt in range(self.max_retries + 1):
+            queued_at = time.monotonic()
+            charged = self._acquire(estimated_tokens, priority)
+            waited = time.monotonic() - queued_at
+            with self._condition:
+                self.stats["requests"] += 1
+                self.stats["tokens_estimated"] += estimated_tokens
+                self.stats["wait_seconds_total"] += waited
+                self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+                if attempt:
+                    self.stats["retries"] += 1
+            try:
+                return call(), charged
+            except Exception as e:
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    with self._condition:
+                        self.stats["failures"] += 1
+                    raise
+                self._backoff(attempt, e)
+
+    def settle(self, charged_tokens, actual_tokens):
+        """Correct the token bucket once a call reports its real usage.
+
+        ``charged_tokens`` is the amount ``run`` returned, not the estimate.
+        """
+        with self._condition:
+            self._token_budget = min(self.tokens_per_minute, self._token_budget + charged_tokens - actual_tokens)
+            self._condition.notify_all()
+
+    def get_stats(self):
+        """Queue depth, wait times and throttling counters."""
+        with self._condition:
+            stats = dict(self.stats)
+            stats["queue_depth"] = len(self._queue)
+            stats["paused_seconds"] = max(0.0, self._paused_until - time.monotonic())
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_groq_scheduler():
+    """Return the scheduler shared by all Streamlit sessions in this process."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            from config import GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE
+            _scheduler = RateLimitScheduler(GROQ_REQUESTS_PER_MINUTE, GROQ_TOKENS_PER_MINUTE)
+        return _scheduler
@@ -0,0 +1,303 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Llama 3's tokenizer averages ~4 characters per token on English prose; 3.5
+# leaves headroom for names, numbers and less compact languages
+CHARS_PER_TOKEN = 3.5
+
+# Split points from coarse to fine. Zero-width matches keep every character,
+# so the pieces always concatenate back to the original text.
+_SPLITTERS = (
+    re.compile(r"(?<=\n)(?=[^\n])"),  # Paragraph / line
+    re.compile(r"(?<=[.!?])(?=\s)"),  # Sentence
+    re.compile(r"(?<=\s)(?=\S)"),  # Word
+)
+
+MAP_PROMPT = """
+Summarize part {index} of {count} of a long Meetings and News transcript.
+Capture the key discussion points, decisions made, action items and important
+facts (names, numbers, dates) from this part only. Write in English.
+
+Transcript part {index} of {count}:
+{text}
+"""
+
+COMBINE_PROMPT = """
+The following are summaries of consecutive parts of a long Meetings and News transcript.
+Merge them into one summary in English, keeping every decision, action item and
+important fact, and removing repetition.
+
+Part summaries:
+{text}
+"""
+
+FINAL_PROMPT = """
+The following are summaries of consecutive parts of a long Meetings and News transcript.
+Combine them into a single concise and informative summary of the whole transcript.
+Highlight the key discussion points, decisions made, and important takeaways.
+
+IMPORTANT: Your summary must be written in {target_language} language.
+
+Part summaries:
+{text}
+"""
+
+
+def estimate_tokens(text):
+    """Conservative token count estimate for the Groq Llama models."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _split_to_size(text, max_chars, level=0):
+    """Split ``text`` into pieces of at most ``max_chars``, at the coarsest boundary that works."""
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_SPLITTERS):
+        return [text[start:start + max_chars] for start in range(0, len(text), max_chars)]
+    pieces = []
+    for part in _SPLITTERS[level].split(text):
+        pieces.extend(_split_to_size(part, max_chars, level + 1))
+    return pieces
+
+
+def split_into_chunks(text, max_tokens):
+    """Split ``text`` into chunks of at most ``max_tokens`` estimated tokens.
+
+    Chunks are packed greedily from whole paragraphs where possible, falling
+    back to sentences, then words, for paragraphs that are too long on their own.
+    """
+    max_chars = max(1, int(max_tokens * CHARS_PER_TOKEN))
+    chunks = []
+    current = []
+    current_chars = 0
+    for piece in _split_to_size(text, max_chars):
+        if current and current_chars + len(piece) > max_chars:
+            chunks.append("".join(current))
+            current, current_chars = [], 0
+        current.append(piece)
+        current_chars += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+def chunks_from_offsets(text, offsets, max_tokens):
+    """Turn precomputed (start, end) chunk offsets into chunks within ``max_tokens``.
+
+    Offsets come from ``TextStats`` during extraction; any chunk that is still
+    over the token budget is split further.
+    """
+    chunks = []
+    for start, end in offsets:
+        chunk = text[start:end]
+        if estimate_tokens(chunk) > max_tokens:
+            chunks.extend(split_into_chunks(chunk, max_tokens))
+        elif chunk.strip():
+            chunks.append(chunk)
+    return chunks
+
+
+def _tail(text, max_chars):
+    """The whole sentences (or, failing that, words) at the end of ``text`` within ``max_chars``."""
+    for splitter in _SPLITTERS[1:]:
+        tail = ""
+        for piece in reversed(splitter.split(text)):
+            if len(tail) + len(piece) > max_chars:
+                break
+            tail = piece + tail
+        if tail.strip():
+            return tail.lstrip()
+    return ""
+
+
+def split_with_overlap(text, max_tokens, overlap_chars=300):
+    """Split ``text`` into sentence-aligned chunks that overlap by about ``overlap_chars``.
+
+    Every chunk after the first starts with the last sentences of the one
+    before it, so each has some context; ``stitch_overlapping`` removes the
+    repeated part again. Chunks stay within ``max_tokens`` including the overlap.
+    """
+    chunks = split_into_chunks(text, max(1, max_tokens - estimate_tokens(" " * overlap_chars)))
+    return chunks[:1] + [
+        _tail(previous, overlap_chars) + chunk for previous, chunk in zip(chunks, chunks[1:])
+    ]
+
+
+def _words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _overlap_end(previous, following, overlap_chars, min_similarity):
+    """Where the repeat of ``previous``'s ending stops in ``following`` (0 if there is none).
+
+    The parts were rewritten separately, so the repeated sentences are
+    compared by their words, fuzzily. Of the sentence-aligned prefixes of
+    ``following`` within twice ``overlap_chars``, the one most similar to the
+    end of ``previous`` wins, if it reaches ``min_similarity``. Prefixes one
+    sentence too short or too long score lower, since they end out of step.
+    """
+    from difflib import SequenceMatcher
+
+    previous_words = _words(previous[-4 * overlap_chars:])
+    best, best_ratio = 0, min_similarity
+    for boundary in _SPLITTERS[1].finditer(following):
+        end = boundary.start()
+        if end > 2 * overlap_chars:
+            break
+        head = _words(following[:end])
+        if not head:
+            continue
+        ratio = SequenceMatcher(None, head, previous_words[-len(head):], autojunk=False).ratio()
+        if ratio >= best_ratio:
+            best, best_ratio = end, ratio
+    return best
+
+
+def stitch_overlapping(parts, overlap_chars=300, min_similarity=0.8, separator="\n\n"):
+    """Join parts from ``split_with_overlap`` (after rewriting), dropping each part's repeated start.
+
+    When no repeat can be found the part is kept whole; a duplicated
+    sentence is better than a lost one.
+    """
+    stitched = []
+    for part in parts:
+        part = part.strip()
+        if stitched:
+            part = part[_overlap_end(stitched[-1], part, overlap_chars, min_similarity):].strip()
+        if part:
+            stitched.append(part)
+    return separator.join(stitched)
+
+
+def _numbered(summaries):
+    return "\n\n".join(f"Part {index}:\n{summary}" for index, summary in enumerate(summaries, start=1))
+
+
+def _group_within_budget(summaries, max_tokens):
+    """Group consecutive summaries so each numbered group fits ``max_tokens``, at least two per group."""
+    groups = [[]]
+    for summary in summaries:
+        group = groups[-1]
+        if len(group) >= 2 and estimate_tokens(_numbered(group + [summary])) > max_tokens:
+            groups.append([summary])
+        else:
+            group.append(summary)
+    return groups
+
+
+def map_reduce_summarize(text, complete, target_language="English", context_tokens=8192,
+                         output_tokens=1024, max_workers=4, chunk_offsets=None,
+                         progress_callback=None):
+    """Summarize a text that does not fit the model's context window.
+
+    The text is split into chunks that fit the budget (``context_tokens`` minus
+    the prompt and ``output_tokens`` reserved for the reply), every chunk is
+    summarized concurrently, and the part summaries are merged: directly into
+    the final summary in ``target_language`` if they fit in one prompt,
+    otherwise in groups, recursively, until they do.
+
+    ``complete(prompt, temperature, max_tokens)`` sends one prompt to the model
+    and returns the reply; errors propagate to the caller.
+    ``progress_callback(done, total)`` is called as chunk summaries finish.
+    """
+    budget = context_tokens - output_tokens - estimate_tokens(MAP_PROMPT) - 16
+    if budget < 2 * output_tokens:
+        raise ValueError("Context window too small for map-reduce summarization")
+
+    if chunk_offsets:
+        chunks = chunks_from_offsets(text, chunk_offsets, budget)
+    else:
+        chunks = split_into_chunks(text, budget)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                complete,
+                MAP_PROMPT.format(index=index, count=len(chunks), text=chunk),
+                0.3,
+                output_tokens,
+            ): index
+            for index, chunk in enumerate(chunks, start=1)
+        }
+        summaries = [None] * len(chunks)
+        for done, future in enumerate(as_completed(futures), start=1):
+            summaries[futures[future] - 1] = future.result()
+            if progress_callback:
+                progress_callback(done, len(chunks))
+
+        # Reduce until everything fits in one final prompt
+        while estimate_tokens(_numbered(summaries)) > budget:
+            groups = _group_within_budget(summaries, budget)
+            summaries = list(executor.map(
+                lambda group: complete(COMBINE_PROMPT.format(text=_numbered(group)), 0.3, output_tokens),
+                groups,
+            ))
+
+    return complete(FINAL_PROMPT.format(target_language=target_language, text=_numbered(summaries)), 0.3, None)
+
+
+def _json_objects(text):
+    """Yield each balanced ``{...}`` in ``text`` in order of its opening brace, skipping braces inside strings."""
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    yield text[start:index + 1]
+                    break
+        start = text.find("{", start + 1)
+
+
+def _as_text(value):
+    """Flatten a JSON value the model used instead of a plain string."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return "\n".join(f"{key}: {_as_text(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return "\n".join(f"- {_as_text(item)}" for item in value)
+    return "" if value is None else str(value)
+
+
+def parse_summary_sentiment(reply):
+    """Parse a combined reply into (summary, sentiment), or None if it is malformed.
+
+    Tolerates Markdown code fences, text around the object and keys in any
+    case. Sentiment given as an object or list (common for the detailed
+    approach) is flattened to text. Both fields must be non-empty.
+    """
+    import json
+
+    if not reply:
+        return None
+    # Scan past prose in braces, placeholders like {summary} and objects
+    # without the expected keys; the first one that has both wins
+    for candidate in _json_objects(reply):
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(data, dict):
+            continue
+        fields = {str(key).strip().lower(): value for key, value in data.items()}
+        summary = _as_text(fields.get("summary"))
+        sentiment = _as_text(fields.get("sentiment"))
+        if summary and sentiment:
+            return summary, sentiment
+    return None
@@ -1,11 +1,20 @@
 import streamlit as st
-import re
-import os
-from datetime import datetime
-import dateparser
-import json
+from functools import partial
 from external_apis import get_groq_client  # Import the client function
-from config import LANGUAGES  # Import the LANGUAGES dictionary
+from config import (  # Import the LANGUAGES dictionary and Groq settings
+    LANGUAGES,
+    GROQ_MODEL,
+    GROQ_CONTEXT_TOKENS,
+    SUMMARY_OUTPUT_TOKENS,
+    SUMMARY_MAP_CONCURRENCY,
+    LANGUAGE_DETECTION_MIN_CONFIDENCE,
+    TRANSCRIPT_CLEANUP_CHUNK_TOKENS,
+    TRANSCRIPT_CLEANUP_OVERLAP_CHARS,
+    TRANSCRIPT_CLEANUP_CONCURRENCY,
+)
+from model_registry import get_whisper_pipeline
+from rate_limiter import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW, get_groq_scheduler
+from processing import preprocess_audio  # Single streaming implementation shared with main
 
 # Define default model size if not in session state
 if 'whisper_model_size' not in st.session_state:
@@ -15,60 +24,246 @@ if 'whisper_model_size' not in st.session_state:
 if 'sentiment_analysis_approach' not in st.session_state:
     st.session_state.sentiment_analysis_approach = "standard"  # Default to standard
 
-# Initialize Groq client (moved here)
-client = get_groq_client()
+def transcribe_with_transformers_whisper(audio_path, whisper_model_size=None, chunked=None,
+                                         chunk_length_s=30, chunk_overlap_s=5, batch_size=4,
+                                         num_workers=None, offset_map=None, return_words=False,
+                                         quantized=None):
+    """Transcribe audio using Transformers Whisper model.
 
-def transcribe_with_transformers_whisper(audio_path, whisper_model_size=None):
-    """Transcribe audio using Transformers Whisper model."""
+    ``audio_path`` is a file path or an in-memory 16 kHz float32 array.
+
+    Recordings longer than one window are transcribed in chunked mode: fixed
+    windows with overlap are batched through the model and stitched back together
+    on word timestamps, which keeps memory flat for hour-long meetings. Pass
+    ``chunked=True``/``False`` to force a mode. On CPU, ``num_workers > 1`` spreads
+    the chunks over a pool of worker processes, and ``quantized=True`` runs the
+    model with dynamic int8 quantization of its linear layers.
+
+    With ``return_words=True`` a (text, words) tuple is returned, where each word
+    carries start/end timestamps. If the audio was trimmed by silence detection,
+    pass its ``offset_map`` so the timestamps point at the original recording.
+    """
     try:
+        import numpy as np
         import torch
-        from transformers import pipeline
+        from audio_utils import (
+            WHISPER_SAMPLE_RATE,
+            get_audio_duration,
+            transcribe_in_windows,
+            words_to_text,
+            result_words,
+            map_words_to_original,
+        )
+        from parallel_transcription import transcribe_parallel
 
         # Use the parameter if provided, otherwise fall back to session state or default
         if whisper_model_size is None:
             whisper_model_size = st.session_state.get("whisper_model_size", "base")
+        if num_workers is None:
+            num_workers = st.session_state.get("transcription_workers", 1)
+        if quantized is None:
+            quantized = st.session_state.get("whisper_quantized", False)
 
         with st.spinner(f"Transcribing audio using Whisper {whisper_model_size} model..."):
             device = "cuda" if torch.cuda.is_available() else "cpu"
-            model_name = f"openai/whisper-{whisper_model_size}"
-            transcriber = pipeline("automatic-speech-recognition", model=model_name, device=device)
-            
-            # Handle different return types based on model version
-            result = transcriber(audio_path, return_timestamps=True)
-            
-            # Check if result is a dictionary or string
-            if isinstance(result, dict):
-                return result.get("text", "")
-            elif isinstance(result, str):
-                return result
+            # Quantized inference is CPU-only, so it takes precedence over a GPU
+            if quantized:
+                device, dtype = "cpu", "int8"
             else:
-                # If chunks, join them
-                if isinstance(result, list) and result and "text" in result[0]:
-                    return " ".join(chunk["text"] for chunk in result)
-                return str(result)
+                dtype = "float32"
+
+            if device == "cpu" and num_workers > 1:
+                progress_bar = st.progress(0.0, text=f"Transcribing audio on {num_workers} workers...")
+
+                def update_parallel_progress(done_s, total_s):
+                    fraction = done_s / total_s if total_s else 1.0
+                    progress_bar.progress(min(fraction, 1.0), text=f"Transcribed {done_s:.0f}s of {total_s:.0f}s")
+
+                words = transcribe_parallel(
+                    audio_path,
+                    whisper_model_size,
+                    num_workers,
+                    window_s=chunk_length_s,
+                    overlap_s=chunk_overlap_s,
+                    batch_size=batch_size,
+                    dtype=dtype,
+                    progress_callback=update_parallel_progress,
+                )
+                progress_bar.empty()
+                text = words_to_text(words)
+            else:
+                # Reuse the process-wide pipeline instead of reloading the model on every upload
+                transcriber = get_whisper_pipeline(whisper_model_size, device=device, dtype=dtype)
+
+                if chunked is None:
+                    try:
+                        chunked = get_audio_duration(audio_path) > chunk_length_s
+                    except Exception:
+                        chunked = False  # Format soundfile can't read; let the pipeline decode it
+
+                if chunked:
+                    progress_bar = st.progress(0.0, text="Transcribing audio in chunks...")
+
+                    def update_progress(done_s, total_s):
+                        fraction = done_s / total_s if total_s else 1.0
+                        progress_bar.progress(min(fraction, 1.0), text=f"Transcribed {done_s:.0f}s of {total_s:.0f}s")
+
+                    words = transcribe_in_windows(
+                        transcriber,
+                        audio_path,
+                        window_s=chunk_length_s,
+                        overlap_s=chunk_overlap_s,
+                        batch_size=batch_size,
+                        progress_callback=update_progress,
+                    )
+                    progress_bar.empty()
+                    text = words_to_text(words)
+                else:
+                    # Handle different return types based on model version
+                    if isinstance(audio_path, np.ndarray):
+                        pipeline_input = {"raw": audio_path, "sampling_rate": WHISPER_SAMPLE_RATE}
+                    else:
+                        pipeline_input = audio_path
+                    result = transcriber(pipeline_input, return_timestamps=True)
+                    words = []
+
+                    # Check if result is a dictionary or string
+                    if isinstance(result, dict):
+                        text = result.get("text", "")
+                        words = result_words(result)
+                    elif isinstance(result, str):
+                        text = result
+                    # If chunks, join them
+                    elif isinstance(result, list) and result and "text" in result[0]:
+                        text = " ".join(chunk["text"] for chunk in result)
+                    else:
+                        text = str(result)
+
+            if return_words:
+                return text, map_words_to_original(words, offset_map)
+            return text
     except ImportError:
         st.error("Required packages not installed. Please install torch and transformers.")
-        return "Transcription failed: Missing dependencies."
+        message = "Transcription failed: Missing dependencies."
+        return (message, []) if return_words else message
     except Exception as e:
         st.error(f"Transcription error: {str(e)}")
-        return f"Transcription failed: {str(e)}"
+        message = f"Transcription failed: {str(e)}"
+        return (message, []) if return_words else message
     
-def preprocess_audio(audio_path):
-    """Enhance audio quality before transcription."""
-    try:
-        import librosa
-        import soundfile as sf
-
-        with st.spinner("Preprocessing audio for improved quality..."):
-            y, sr = librosa.load(audio_path, sr=16000)
-            y_denoised = librosa.effects.preemphasis(y)
-            y_normalized = librosa.util.normalize(y_denoised)
-            processed_path = audio_path.replace('.', '_enhanced.')
-            sf.write(processed_path, y_normalized, sr)
-            return processed_path
-    except Exception as e:
-        st.warning(f"Audio preprocessing skipped: {e}")
-        return audio_path
+def _groq_client(client=None):
+    """``client``, or the shared process-wide client (``external_apis.get_groq_client``) when None."""
+    return client if client is not None else get_groq_client()
+
+
+def _complete(client, prompt, temperature, max_tokens=None, json_mode=False, priority=None,
+              allow_truncated=True):
+    """Send one user prompt to the Groq chat model and return the stripped reply.
+
+    ``json_mode`` asks the API to constrain the reply to a JSON object. A
+    reply cut off by the token limit is returned as is, or raises
+    ``RuntimeError`` when ``allow_truncated`` is False, and is never cached.
+    Complete replies are cached on disk (see ``cache_utils.LLMResponseCache``), and
+    calls that do reach the API are queued by ``priority`` through the shared
+    rate-limit scheduler, which retries 429s with backoff.
+    """
+    from cache_utils import get_llm_cache, llm_cache_key
+    from summarization import estimate_tokens
+
+    options = {"max_tokens": max_tokens} if max_tokens else {}
+    if json_mode:
+        options["response_format"] = {"type": "json_object"}
+
+    def send():
+        return client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            **options
+        )
+
+    truncated = False
+
+    def request():
+        nonlocal truncated
+        scheduler = get_groq_scheduler()
+        # Groq counts prompt and completion tokens against the per-minute budget
+        estimated = estimate_tokens(prompt) + (max_tokens or SUMMARY_OUTPUT_TOKENS)
+        response, charged = scheduler.run(send, estimated, PRIORITY_NORMAL if priority is None else priority)
+        usage = getattr(response, "usage", None)
+        if getattr(usage, "total_tokens", None):
+            scheduler.settle(charged, usage.total_tokens)
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            if not allow_truncated:
+                raise RuntimeError("reply was cut off at the token limit")
+            truncated = True
+        return choice.message.content.strip()
+
+    cache = get_llm_cache()
+    if cache is None:
+        return request()
+    # Identical requests (reruns, or another session on the same meeting) reuse the reply
+    return cache.get_or_compute(
+        llm_cache_key(GROQ_MODEL, prompt, temperature, max_tokens, json_mode),
+        request,
+        cacheable=lambda value: not truncated,
+    )
+
+
+def _complete_stream(client, prompt, temperature, max_tokens=None, priority=None):
+    """Like ``_complete``, but yield the reply as text deltas while it is generated.
+
+    Uses the chat completions stream API. A cached reply is yielded whole, and
+    a non-empty streamed reply that wasn't cut off by the token limit is cached
+    once complete, under the same key as ``_complete`` so either path reuses
+    the other's replies. Only opening the stream goes through the rate-limit
+    scheduler; that is where 429s surface.
+    """
+    from cache_utils import get_llm_cache, llm_cache_key
+    from summarization import estimate_tokens
+
+    cache = get_llm_cache()
+    key = llm_cache_key(GROQ_MODEL, prompt, temperature, max_tokens, False)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached:
+            yield cached
+            return
+
+    options = {"max_tokens": max_tokens} if max_tokens else {}
+
+    def send():
+        return client.chat.completions.create(
+            model=GROQ_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True,
+            **options
+        )
+
+    scheduler = get_groq_scheduler()
+    estimated = estimate_tokens(prompt) + (max_tokens or SUMMARY_OUTPUT_TOKENS)
+    stream, charged = scheduler.run(send, estimated, PRIORITY_NORMAL if priority is None else priority)
+    parts = []
+    finish_reason = None
+    for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if chunk.choices and chunk.choices[0].finish_reason:
+            finish_reason = chunk.choices[0].finish_reason
+        if delta:
+            parts.append(delta)
+            yield delta
+        # Groq reports usage on the last chunk
+        usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if getattr(usage, "total_tokens", None):
+            scheduler.settle(charged, usage.total_tokens)
+
+    text = "".join(parts).strip()
+    # Empty or truncated replies are failures; don't serve them again
+    if cache is not None and text and finish_reason != "length":
+        cache.set(key, text)
+
 
 def translate_to_english(text):
     """Use Groq API to translate non-English text to English."""
@@ -84,24 +279,34 @@ def translate_to_english(text):
     {text}
     """
     try:
+        client = get_groq_client()  # Shared, process-wide client
         if client is None:
             return text  # Return original text if client is unavailable
             
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
+        return _complete(client, prompt, temperature=0.1)
     except Exception as e:
         st.error(f"Error translating text: {e}")
         return text  # Return original text if translation fails
 
 def detect_language(text):
-    """Use Groq API to detect the language of the transcript."""
+    """Detect the language of the transcript.
+
+    A local character n-gram classifier (see ``language_detection``) answers
+    in well under a millisecond; the Groq API is asked only when its
+    confidence is below ``LANGUAGE_DETECTION_MIN_CONFIDENCE``.
+    """
     if not text or len(text.strip()) < 10:
         return "English"  # Default to English for empty or very short texts
 
+    from language_detection import get_language_detector
+
+    try:
+        language, confidence = get_language_detector().detect(text)
+        if language is not None and confidence >= LANGUAGE_DETECTION_MIN_CONFIDENCE:
+            return language
+    except Exception:
+        pass  # Fall back to the API if the profiles can't be loaded
+
     prompt = f"""
     Based on the following text, detect the language it's written in.
     Return only the language name in English (e.g., "English", "Spanish", "Japanese", etc.).
@@ -110,16 +315,12 @@ def detect_language(text):
     {text[:1000]}  # Using just the first 1000 characters for efficiency
     """
     try:
+        client = get_groq_client()  # Shared, process-wide client
         if client is None:
             return "English"  # Default to English if client is unavailable
             
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=50  # Limit response to just the language name
-        )
-        detected = response.choices[0].message.content.strip()
+        # Just the language name; short and on the critical path, so it goes first
+        detected = _complete(client, prompt, temperature=0.1, max_tokens=50, priority=PRIORITY_HIGH)
         # Handle case where response might include more text than just the language name
         for language in LANGUAGES.keys():
             if language.lower() in detected.lower():
@@ -129,12 +330,13 @@ def detect_language(text):
         st.error(f"Error detecting language: {e}")
         return "English"  # Default to English if detection fails
 
-def improve_transcript_quality(transcript):
-    """Use Groq API to improve transcript quality by fixing errors, punctuation, and formatting."""
-    if not transcript or len(transcript.strip()) < 50:
-        return transcript
-
-    prompt = f"""
+def _cleanup_prompt(transcript, index=None, count=None):
+    part = ""
+    if count:
+        part = f"""
+    This is part {index} of {count} of a longer transcript, so it may start or end mid-conversation.
+"""
+    return f"""
     You are an expert transcriptionist. Improve the following Meetings and News transcript by:
     1. Fixing spelling and grammar errors
     2. Adding proper punctuation and capitalization
@@ -142,35 +344,77 @@ def improve_transcript_quality(transcript):
     4. Formatting into clear paragraphs
     5. Removing filler words, repetitions, and disfluencies
     6. Preserving the original meaning and all important content
-
+{part}
     Original transcript:
     {transcript}
 
     Return only the improved transcript without explanations.
     """
+
+
+def improve_transcript_quality(transcript):
+    """Use Groq API to improve transcript quality by fixing errors, punctuation, and formatting.
+
+    Transcripts longer than ``TRANSCRIPT_CLEANUP_CHUNK_TOKENS`` are split into
+    sentence-aligned, overlapping chunks that are cleaned up concurrently and
+    stitched back together, so the rewrite never runs into the output limit.
+    """
+    if not transcript or len(transcript.strip()) < 50:
+        return transcript
+
     try:
+        from summarization import estimate_tokens
+
+        client = get_groq_client()  # Shared, process-wide client
         if client is None:
             return transcript  # Return original transcript if client is unavailable
-            
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
+
+        if estimate_tokens(transcript) <= TRANSCRIPT_CLEANUP_CHUNK_TOKENS:
+            return _complete(client, _cleanup_prompt(transcript), temperature=0.1)
+        return _improve_in_chunks(transcript, client)
     except Exception as e:
         st.error(f"Error improving transcript: {e}")
         return transcript  # Return original transcript if improvement fails
 
-def summarize_text_groq(transcript, client, target_language="English"):
-    """Use Groq API to summarize the Meetings and News transcript."""
-    if not transcript or len(transcript.strip()) < 50:
-        return "The transcript is too short to summarize."
-    
-    if client is None:
-        return "Summary unavailable. API client not initialized."
 
-    prompt = f"""
+def _improve_in_chunks(transcript, client):
+    """Clean up a long transcript chunk by chunk; chunks that fail are kept as transcribed."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from summarization import estimate_tokens, split_with_overlap, stitch_overlapping
+
+    chunks = split_with_overlap(transcript, TRANSCRIPT_CLEANUP_CHUNK_TOKENS, TRANSCRIPT_CLEANUP_OVERLAP_CHARS)
+    progress_bar = st.progress(0.0, text=f"Cleaning up transcript in {len(chunks)} parts...")
+
+    def clean(index, chunk):
+        # The rewrite is about as long as the chunk; leave headroom for speaker labels
+        max_tokens = estimate_tokens(chunk) * 5 // 4 + 64
+        # A cut-off rewrite would drop the end of the chunk; keep it as transcribed instead
+        return _complete(
+            client, _cleanup_prompt(chunk, index, len(chunks)), temperature=0.1,
+            max_tokens=max_tokens, allow_truncated=False,
+        )
+
+    cleaned = list(chunks)
+    errors = []
+    with ThreadPoolExecutor(max_workers=TRANSCRIPT_CLEANUP_CONCURRENCY) as executor:
+        futures = {executor.submit(clean, index, chunk): index for index, chunk in enumerate(chunks, start=1)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                cleaned[futures[future] - 1] = future.result()
+            except Exception as e:
+                errors.append(e)
+            progress_bar.progress(done / len(chunks), text=f"Cleaned up {done}/{len(chunks)} transcript parts")
+    progress_bar.empty()
+
+    if errors:
+        st.warning(
+            f"Could not clean up {len(errors)} of {len(chunks)} transcript parts ({errors[0]}); "
+            "they are shown as transcribed."
+        )
+    return stitch_overlapping(cleaned, TRANSCRIPT_CLEANUP_OVERLAP_CHARS)
+
+def _summary_prompt(transcript, target_language):
+    return f"""
     Summarize the following Meetings and News transcript in a concise and informative way.
     Highlight the key discussion points, decisions made, and important takeaways.
 
@@ -179,20 +423,63 @@ def summarize_text_groq(transcript, client, target_language="English"):
     Transcript:
     {transcript}
     """
+
+
+def _fits_context(prompt):
+    """Whether ``prompt`` and a summary-sized reply fit the model's context window."""
+    from summarization import estimate_tokens
+    return estimate_tokens(prompt) + SUMMARY_OUTPUT_TOKENS <= GROQ_CONTEXT_TOKENS
+
+
+def summarize_text_groq(transcript, client=None, target_language="English", chunk_offsets=None):
+    """Use Groq API to summarize the Meetings and News transcript.
+
+    Transcripts that don't fit the model's context window are summarized
+    map-reduce style (see ``summarization.map_reduce_summarize``); pass the
+    ``chunk_offsets`` recorded during extraction to reuse its chunking.
+    """
+    client = _groq_client(client)
+    if not transcript or len(transcript.strip()) < 50:
+        return "The transcript is too short to summarize."
+    
+    if client is None:
+        return "Summary unavailable. API client not initialized."
+
+    prompt = _summary_prompt(transcript, target_language)
     try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
+        from summarization import map_reduce_summarize
+
+        if _fits_context(prompt):
+            return _complete(client, prompt, temperature=0.3)
+
+        progress_bar = st.progress(0.0, text="Summarizing long transcript in parts...")
+
+        def update_progress(done, total):
+            progress_bar.progress(done / total, text=f"Summarized {done}/{total} parts")
+
+        summary = map_reduce_summarize(
+            transcript,
+            partial(_complete, client, priority=PRIORITY_LOW),  # Bulk chunks yield to interactive calls
+            target_language,
+            context_tokens=GROQ_CONTEXT_TOKENS,
+            output_tokens=SUMMARY_OUTPUT_TOKENS,
+            max_workers=SUMMARY_MAP_CONCURRENCY,
+            chunk_offsets=chunk_offsets,
+            progress_callback=update_progress,
         )
-        return response.choices[0].message.content.strip()
+        progress_bar.empty()
+        return summary
     except Exception as e:
         st.error(f"Error summarizing text: {e}")
         return "Summary failed to generate."
 
 
-def analyze_sentiment(transcript, client):
-    """Use Groq API to analyze the sentiment of the transcript."""
+def analyze_sentiment(transcript, client=None, sentiment_approach=None):
+    """Use Groq API to analyze the sentiment of the transcript.
+
+    ``sentiment_approach`` defaults to the one selected in the sidebar.
+    """
+    client = _groq_client(client)
     if not transcript or len(transcript.strip()) < 50:
         return "The transcript is too short to analyze sentiment."
     
@@ -200,7 +487,8 @@ def analyze_sentiment(transcript, client):
         return "Sentiment analysis unavailable. API client not initialized."
         
     # Check which sentiment analysis approach to use
-    sentiment_approach = st.session_state.get("sentiment_analysis_approach", "standard")
+    if sentiment_approach is None:
+        sentiment_approach = st.session_state.get("sentiment_analysis_approach", "standard")
     
     if sentiment_approach == "standard":
         return analyze_standard_sentiment(transcript, client)
@@ -212,30 +500,10 @@ def analyze_sentiment(transcript, client):
         return analyze_standard_sentiment(transcript, client)  # Default fallback
 
 
-def analyze_standard_sentiment(transcript, client):
-    """Standard sentiment analysis providing basic positive/negative/neutral classification."""
-    prompt = f"""
-    Analyze the overall sentiment of the following Meetings and News transcript.
-    Return the sentiment as one of the following: "Positive", "Negative", or "Neutral".
-
-    Transcript:
-    {transcript}
-    """
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        st.error(f"Error analyzing sentiment: {e}")
-        return "Sentiment analysis failed."
-
-
-def analyze_detailed_sentiment(transcript, client):
-    """Advanced sentiment analysis with confidence scores and reasoning."""
-    prompt = f"""
+def _sentiment_prompt(transcript, sentiment_approach):
+    """The (prompt, temperature) for a sentiment analysis approach; unknown ones get "standard"."""
+    if sentiment_approach == "detailed":
+        return f"""
     Perform an advanced sentiment analysis of the following Meetings and News transcript.
     Provide:
     1. Overall sentiment classification (Positive, Negative, or Neutral)
@@ -248,22 +516,9 @@ def analyze_detailed_sentiment(transcript, client):
 
     Transcript:
     {transcript}
-    """
-    try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        st.error(f"Error analyzing detailed sentiment: {e}")
-        return "Detailed sentiment analysis failed."
-
-
-def analyze_emotional_sentiment(transcript, client):
-    """Emotional sentiment analysis focusing on specific emotions present."""
-    prompt = f"""
+    """, 0.3
+    if sentiment_approach == "emotional":
+        return f"""
     Analyze the emotional content of the following Meetings and News transcript.
     Identify the primary emotions present (such as joy, frustration, enthusiasm, concern, etc.)
     and provide examples from the transcript that demonstrate these emotions.
@@ -274,40 +529,311 @@ def analyze_emotional_sentiment(transcript, client):
 
     Transcript:
     {transcript}
-    """
+    """, 0.3
+    return f"""
+    Analyze the overall sentiment of the following Meetings and News transcript.
+    Return the sentiment as one of the following: "Positive", "Negative", or "Neutral".
+
+    Transcript:
+    {transcript}
+    """, 0.2
+
+
+def analyze_standard_sentiment(transcript, client=None):
+    """Standard sentiment analysis providing basic positive/negative/neutral classification."""
+    client = _groq_client(client)
     try:
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
+        return _complete(client, *_sentiment_prompt(transcript, "standard"))
+    except Exception as e:
+        st.error(f"Error analyzing sentiment: {e}")
+        return "Sentiment analysis failed."
+
+
+def analyze_detailed_sentiment(transcript, client=None):
+    """Advanced sentiment analysis with confidence scores and reasoning."""
+    client = _groq_client(client)
+    try:
+        return _complete(client, *_sentiment_prompt(transcript, "detailed"))
+    except Exception as e:
+        st.error(f"Error analyzing detailed sentiment: {e}")
+        return "Detailed sentiment analysis failed."
+
+
+def analyze_emotional_sentiment(transcript, client=None):
+    """Emotional sentiment analysis focusing on specific emotions present."""
+    client = _groq_client(client)
+    try:
+        return _complete(client, *_sentiment_prompt(transcript, "emotional"))
     except Exception as e:
         st.error(f"Error analyzing emotional sentiment: {e}")
         return "Emotional sentiment analysis failed."
     
-def translate_to_language(text, target_language="English", client=None):
-    """Use Groq API to translate text to the specified language."""
-    if not text or len(text.strip()) < 10 or target_language.lower() == "english":
-        return text
-
-    prompt = f"""
+def _translation_prompt(text, target_language):
+    return f"""
     Translate the following text to {target_language}.
     Only provide the translation without any explanations or comments.
 
     Text to translate:
     {text}
     """
+
+
+def translate_to_language(text, target_language="English", client=None):
+    """Use Groq API to translate text to the specified language."""
+    client = _groq_client(client)
+    if not text or len(text.strip()) < 10 or target_language.lower() == "english":
+        return text
+
     try:
         if client is None:
             return text  # Return original text if client is unavailable
             
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
+        return _complete(client, _translation_prompt(text, target_language), temperature=0.1)
     except Exception as e:
         st.error(f"Error translating text: {e}")
-        return text  # Return original text if translation fails
\ No newline at end of file
+        return text  # Return original text if translation fails
+
+
+# Approximate size of the instructions around the transcript in the summary and sentiment prompts
+SUMMARY_PROMPT_OVERHEAD_TOKENS = 60
+
+# What the "sentiment" field should hold for each approach in the single-call mode
+COMBINED_SENTIMENT_INSTRUCTIONS = {
+    "standard": 'exactly one of "Positive", "Negative", or "Neutral"',
+    "detailed": (
+        "an advanced sentiment analysis as plain text with these sections: overall sentiment "
+        "(Positive, Negative, or Neutral), confidence score (1-10), key factors influencing the "
+        "sentiment, shifts in sentiment throughout the Meetings and News, and the most emotionally "
+        "charged topics or moments"
+    ),
+    "emotional": (
+        "an emotional analysis as plain text: the primary emotions present (such as joy, frustration, "
+        "enthusiasm, concern) with examples from the transcript, and any emotional patterns between "
+        "different speakers"
+    ),
+}
+
+
+def summarize_with_sentiment(transcript, client=None, target_language="English", sentiment_approach="standard"):
+    """Ask for the summary and the sentiment analysis in one JSON response.
+
+    Sends the transcript once instead of twice. Returns (summary, sentiment,
+    tokens_saved), where tokens_saved is the estimated prompt tokens saved
+    compared with the separate summary and sentiment calls. Returns None when
+    the transcript needs map-reduce summarization, or when the reply can't be
+    parsed or the call fails. The caller should then use the two-call path.
+    """
+    client = _groq_client(client)
+    from summarization import estimate_tokens, parse_summary_sentiment
+
+    instructions = COMBINED_SENTIMENT_INSTRUCTIONS.get(sentiment_approach, COMBINED_SENTIMENT_INSTRUCTIONS["standard"])
+    prompt = f"""
+    Analyze the following Meetings and News transcript and respond with a JSON object with two string fields:
+    "summary": a concise and informative summary highlighting the key discussion points,
+    decisions made, and important takeaways, written in {target_language} language.
+    "sentiment": {instructions}.
+
+    Respond with the JSON object only.
+
+    Transcript:
+    {transcript}
+    """
+    if estimate_tokens(prompt) + 2 * SUMMARY_OUTPUT_TOKENS > GROQ_CONTEXT_TOKENS:
+        return None  # Long transcripts are summarized map-reduce style instead
+
+    try:
+        parsed = parse_summary_sentiment(_complete(client, prompt, temperature=0.3, json_mode=True))
+    except Exception:
+        return None
+    if parsed is None:
+        return None
+
+    # The separate path sends the transcript in two prompts of about the same size
+    tokens_saved = 2 * estimate_tokens(transcript) + 2 * SUMMARY_PROMPT_OVERHEAD_TOKENS - estimate_tokens(prompt)
+    return parsed[0], parsed[1], tokens_saved
+
+
+def summarize_and_analyze(transcript, client=None, target_language=None, sentiment_approach=None,
+                          chunk_offsets=None, related_news_fetcher=None, combined=False):
+    """Run the summary and sentiment calls concurrently.
+
+    Each result is translated to ``target_language`` (when given) as soon as
+    it is ready, and ``related_news_fetcher(summary_english)`` starts as soon
+    as the English summary is. With ``combined=True`` both come from a single
+    JSON call (``summarize_with_sentiment``), falling back to the two calls
+    if that fails. Returns a dict with ``summary_english``,
+    ``sentiment_english``, ``summary``, ``sentiment``, ``related_news``,
+    ``combined`` (whether the single call was used), ``tokens_saved`` and
+    per-step ``timings`` in seconds, including ``total``.
+    """
+    client = _groq_client(client)
+    from concurrent.futures import Future, ThreadPoolExecutor
+    from perf_utils import submit_with_context, then, timed
+
+    if sentiment_approach is None:
+        # Read on the script thread; worker threads get it passed explicitly
+        sentiment_approach = st.session_state.get("sentiment_analysis_approach", "standard")
+
+    timings = {}
+
+    def step(name, function, *args, **kwargs):
+        with timed(timings, name):
+            return function(*args, **kwargs)
+
+    def translate(text, name):
+        return step(name, translate_to_language, text, target_language, client)
+
+    with timed(timings, "total"), ThreadPoolExecutor(max_workers=4) as executor:
+        single = None
+        if combined:
+            single = step("summary_and_sentiment", summarize_with_sentiment, transcript, client,
+                          sentiment_approach=sentiment_approach)
+        if single is not None:
+            summary_english, sentiment_english = Future(), Future()
+            summary_english.set_result(single[0])
+            sentiment_english.set_result(single[1])
+        else:
+            summary_english = submit_with_context(
+                executor, step, "summary", summarize_text_groq, transcript, client, chunk_offsets=chunk_offsets
+            )
+            sentiment_english = submit_with_context(
+                executor, step, "sentiment", analyze_sentiment, transcript, client, sentiment_approach
+            )
+        summary, sentiment = summary_english, sentiment_english
+        if target_language and target_language.lower() != "english":
+            summary = then(executor, summary_english, translate, "summary_translation")
+            sentiment = then(executor, sentiment_english, translate, "sentiment_translation")
+        related_news = None
+        if related_news_fetcher is not None:
+            related_news = then(executor, summary_english, lambda text: step("related_news", related_news_fetcher, text))
+
+        results = {
+            "summary_english": summary_english.result(),
+            "sentiment_english": sentiment_english.result(),
+            "summary": summary.result(),
+            "sentiment": sentiment.result(),
+            "related_news": related_news.result() if related_news is not None else None,
+            "combined": single is not None,
+            "tokens_saved": single[2] if single is not None else 0,
+        }
+    results["timings"] = timings
+    return results
+
+
+
+def stream_summary(transcript, client=None, target_language="English", chunk_offsets=None):
+    """Streaming variant of ``summarize_text_groq`` that yields text deltas.
+
+    Transcripts that need map-reduce summarization are summarized as before
+    and the summary is yielded whole.
+    """
+    client = _groq_client(client)
+    if not transcript or len(transcript.strip()) < 50 or client is None:
+        yield summarize_text_groq(transcript, client, target_language)
+        return
+
+    prompt = _summary_prompt(transcript, target_language)
+    if not _fits_context(prompt):
+        yield summarize_text_groq(transcript, client, target_language, chunk_offsets=chunk_offsets)
+        return
+    try:
+        yield from _complete_stream(client, prompt, temperature=0.3)
+    except Exception as e:
+        st.error(f"Error summarizing text: {e}")
+        yield "Summary failed to generate."
+
+
+def stream_sentiment(transcript, client=None, sentiment_approach=None):
+    """Streaming variant of ``analyze_sentiment`` that yields text deltas."""
+    client = _groq_client(client)
+    if not transcript or len(transcript.strip()) < 50 or client is None:
+        yield analyze_sentiment(transcript, client, sentiment_approach)
+        return
+
+    if sentiment_approach is None:
+        sentiment_approach = st.session_state.get("sentiment_analysis_approach", "standard")
+    try:
+        yield from _complete_stream(client, *_sentiment_prompt(transcript, sentiment_approach))
+    except Exception as e:
+        st.error(f"Error analyzing sentiment: {e}")
+        yield "Sentiment analysis failed."
+
+
+def stream_translation(text, target_language, client=None):
+    """Streaming variant of ``translate_to_language`` that yields text deltas."""
+    client = _groq_client(client)
+    if not text or len(text.strip()) < 10 or target_language.lower() == "english" or client is None:
+        yield text
+        return
+    try:
+        yield from _complete_stream(client, _translation_prompt(text, target_language), temperature=0.1)
+    except Exception as e:
+        st.error(f"Error translating text: {e}")
+        yield text
+
+
+def stream_summary_and_analysis(transcript, client=None, target_language=None, sentiment_approach=None,
+                                chunk_offsets=None, related_news_fetcher=None):
+    """Streaming counterpart of ``summarize_and_analyze``.
+
+    The summary and sentiment calls start right away in background threads
+    and are consumed as ``perf_utils.BackgroundStream`` objects, so the page
+    can render one while the other is still being generated. When
+    ``target_language`` is not English, each English result is followed by a
+    streamed translation, and ``related_news_fetcher(summary_english)`` runs
+    once the English summary is complete. Returns a dict with
+    ``summary_english`` and ``sentiment_english`` streams, ``summary`` and
+    ``sentiment`` translation streams (None when not translating),
+    ``related_news`` (a future, or None) and ``timings``, which fills in with
+    the time to first token (``<step>_ttft``) and total time of each step,
+    in seconds from this call.
+    """
+    client = _groq_client(client)
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from perf_utils import BackgroundStream, submit_with_context, timed_stream
+
+    if sentiment_approach is None:
+        # Read on the script thread; worker threads get it passed explicitly
+        sentiment_approach = st.session_state.get("sentiment_analysis_approach", "standard")
+
+    timings = {}
+    start = time.perf_counter()
+    translating = bool(target_language) and target_language.lower() != "english"
+
+    def translate(english, name):
+        text = english.result()  # Waits for the English stream to finish
+        yield from timed_stream(stream_translation(text, target_language, client), timings, name, start)
+
+    def fetch_news(english):
+        try:
+            return related_news_fetcher(english.result())
+        finally:
+            timings["related_news"] = time.perf_counter() - start
+
+    # Every task is submitted up front so the executor can be released without
+    # waiting; the threads exit once the streams are consumed
+    executor = ThreadPoolExecutor(max_workers=5)
+    summary_english = BackgroundStream(
+        executor, timed_stream,
+        stream_summary(transcript, client, chunk_offsets=chunk_offsets), timings, "summary", start,
+    )
+    sentiment_english = BackgroundStream(
+        executor, timed_stream,
+        stream_sentiment(transcript, client, sentiment_approach), timings, "sentiment", start,
+    )
+    results = {
+        "summary_english": summary_english,
+        "sentiment_english": sentiment_english,
+        "summary": None,
+        "sentiment": None,
+        "related_news": None,
+        "timings": timings,
+    }
+    if translating:
+        results["summary"] = BackgroundStream(executor, translate, summary_english, "summary_translation")
+        results["sentiment"] = BackgroundStream(executor, translate, sentiment_english, "sentiment_translation")
+    if related_news_fetcher is not None:
+        results["related_news"] = submit_with_context(executor, fetch_news, summary_english)
+    executor.shutdown(wait=False)
+    return results